@@ -38,7 +38,7 @@ def forum_post_flow_example():
     print("\n[2] KINESIS PRODUCER")
     print(f"    → Sends to: content_moderation_stream")
     print(f"    → Partition Key: {user_id} (for ordering)")
-    print(f"    → Shard: shard-001 (hash(user_id) % 4)")
+    print(f"    → Shard: shard-001 (MD5(user_id) key range)")
     print(f"    → Sequence Number: shard-001-000000012345")
     
     # Step 3: Kinesis Consumer
@@ -4,7 +4,7 @@ Kafka/Kinesis message broker client
 import os
 import json
 import logging
-from typing import Dict, Any, Callable, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from kafka import KafkaProducer, KafkaConsumer
 from kafka.errors import KafkaError
 import time
@@ -12,6 +12,13 @@ import time
 logger = logging.getLogger(__name__)
 
 
+def _serialize_value(value: Any) -> bytes:
+    """JSON-encode a message; payloads already serialized to bytes pass through"""
+    if isinstance(value, bytes):
+        return value
+    return json.dumps(value).encode('utf-8')
+
+
 class MessageBroker:
     """Kafka producer and consumer wrapper"""
     
@@ -26,7 +33,7 @@ class MessageBroker:
         try:
             self.producer = KafkaProducer(
                 bootstrap_servers=self.bootstrap_servers,
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                value_serializer=_serialize_value,
                 key_serializer=lambda k: k.encode('utf-8') if k else None,
                 acks='all',
                 retries=3,
@@ -53,6 +60,37 @@ class MessageBroker:
             logger.error(f"Failed to send message to {topic}: {e}")
             return False
     
+    def publish_many(self, topic: str, messages: List[Dict[str, Any]], key_field: Optional[str] = None) -> int:
+        """Publish a batch of messages to topic, blocking once for the whole batch"""
+        return self.publish_raw_many(
+            topic,
+            [(message.get(key_field) if key_field else None, message) for message in messages]
+        )
+    
+    def publish_raw_many(self, topic: str, records: List[Tuple[Optional[str], Any]]) -> int:
+        """
+        Publish a batch of (key, value) records to topic, blocking once for the
+        whole batch. Values may be dicts or JSON already encoded to bytes.
+        """
+        if not records:
+            return 0
+        try:
+            futures = [
+                self.producer.send(topic, value=value, key=key)
+                for key, value in records
+            ]
+            self.producer.flush(timeout=10)
+        except KafkaError as e:
+            logger.error(f"Failed to send batch to {topic}: {e}")
+            return 0
+        
+        sent = sum(1 for future in futures if future.succeeded())
+        if sent < len(records):
+            logger.error(f"Failed to send {len(records) - sent} of {len(records)} messages to {topic}")
+        else:
+            logger.debug(f"Batch of {sent} messages sent to {topic}")
+        return sent
+    
     def publish_content(self, content: Dict[str, Any]):
         """Publish to content-stream topic (Flow A)"""
         return self.publish('content-stream', content, key=content.get('content_id'))
@@ -61,6 +99,22 @@ class MessageBroker:
         """Publish to chat-stream topic (Flow B)"""
         return self.publish('chat-stream', message, key=message.get('user_id'))
     
+    def publish_content_many(self, contents: List[Dict[str, Any]]) -> int:
+        """Publish a batch to content-stream topic (Flow A)"""
+        return self.publish_many('content-stream', contents, key_field='content_id')
+    
+    def publish_chat_many(self, messages: List[Dict[str, Any]]) -> int:
+        """Publish a batch to chat-stream topic (Flow B)"""
+        return self.publish_many('chat-stream', messages, key_field='user_id')
+    
+    def publish_content_bytes_many(self, records: List[Tuple[Optional[str], bytes]]) -> int:
+        """Publish pre-serialized (content_id, payload) records to content-stream (Flow A)"""
+        return self.publish_raw_many('content-stream', records)
+    
+    def publish_chat_bytes_many(self, records: List[Tuple[Optional[str], bytes]]) -> int:
+        """Publish pre-serialized (user_id, payload) records to chat-stream (Flow B)"""
+        return self.publish_raw_many('chat-stream', records)
+    
     def publish_dlq(self, original_message: Dict[str, Any], error: str):
         """Publish failed message to dead letter queue"""
         dlq_message = {
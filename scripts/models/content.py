@@ -77,6 +77,11 @@ class Content(BaseModel):
     parent_content_id: Optional[UUID] = None  # For replies/threads
     channel_id: Optional[str] = None
     
+    @property
+    def has_media(self) -> bool:
+        """True if the content carries an image or any media attachment."""
+        return bool(self.image_url or self.media_urls)
+    
     class Config:
         json_encoders = {
             UUID: str,
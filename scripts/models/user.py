@@ -3,21 +3,43 @@ User and Reputation data models.
 Tracks user behavior for risk-based routing.
 """
 
-from datetime import datetime
-from typing import Optional, List, Dict
-from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+import math
+import sys
+from typing import Optional, List, Dict, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from uuid import UUID, uuid4
 
 from models.enums import UserRiskLevel, ViolationType
 
 
+def to_epoch_seconds(ts: datetime) -> int:
+    """Unix seconds for a datetime; naive values are taken as UTC."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp())
+
+
 class ViolationHistory(BaseModel):
     """Record of a user's past violation."""
     violation_type: ViolationType
     severity: int
     content_id: UUID
     timestamp: datetime
+    timestamp_epoch: Optional[int] = None  # Unix seconds; derived from timestamp if unset
     action_taken: str  # warning, mute, ban
+    
+    @field_validator('action_taken')
+    @classmethod
+    def _intern_action(cls, value: str) -> str:
+        """Share one string object per action across all histories."""
+        return sys.intern(value)
+    
+    def epoch_seconds(self) -> int:
+        """Violation time as Unix seconds."""
+        if self.timestamp_epoch is not None:
+            return self.timestamp_epoch
+        return to_epoch_seconds(self.timestamp)
 
 
 class ReputationScore(BaseModel):
@@ -51,6 +73,48 @@ class ReputationScore(BaseModel):
     last_updated: datetime = Field(default_factory=datetime.utcnow)
     last_violation: Optional[datetime] = None
     
+    # Set when scoring inputs change; cleared by ReputationService.calculate_reputation
+    _dirty: bool = PrivateAttr(default=True)
+    # Unix seconds of the last calculation; the score also depends on the clock
+    _scored_at: int = PrivateAttr(default=0)
+    
+    # Exponentially decayed violation impact, folded in from violation_history
+    _decayed_violation_score: float = PrivateAttr(default=0.0)
+    _last_decayed_at: int = PrivateAttr(default=0)
+    _violations_folded: int = PrivateAttr(default=0)
+    
+    @property
+    def is_stale(self) -> bool:
+        """True if scoring inputs changed since the score was last calculated."""
+        return self._dirty or self._violations_folded != len(self.violation_history)
+    
+    def mark_dirty(self) -> None:
+        """Flag the score for recalculation on next read."""
+        self._dirty = True
+    
+    def decayed_violations(self, decay_seconds: float) -> Tuple[float, int]:
+        """
+        Get (decayed violation impact, epoch seconds it is decayed to).
+        History is append-only, so only entries added since the last call
+        are folded in, each as severity * 10 decayed by exp(-age / decay_seconds).
+        """
+        if self._violations_folded != len(self.violation_history):
+            score = self._decayed_violation_score
+            decayed_at = self._last_decayed_at
+            for violation in self.violation_history[self._violations_folded:]:
+                ts = violation.epoch_seconds()
+                impact = violation.severity * 10.0
+                if ts >= decayed_at:
+                    score = score * math.exp((decayed_at - ts) / decay_seconds) + impact
+                    decayed_at = ts
+                else:
+                    # Out-of-order entry: decay it to the running time instead
+                    score += impact * math.exp((ts - decayed_at) / decay_seconds)
+            self._decayed_violation_score = score
+            self._last_decayed_at = decayed_at
+            self._violations_folded = len(self.violation_history)
+        return self._decayed_violation_score, self._last_decayed_at
+    
     def calculate_risk_level(self) -> UserRiskLevel:
         """Calculate user risk level based on reputation."""
         if self.overall_score >= 80 and self.violations_last_30_days == 0:
@@ -4,9 +4,10 @@ Interfaces with SageMaker for NLP and Rekognition for image analysis.
 Target latency: <500ms
 """
 
+import asyncio
 import random
 import math
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass
 from uuid import UUID
@@ -64,7 +65,7 @@ class MLScoringService:
         
         # Score image content if present
         image_analysis = None
-        if content.image_url or content.media_urls:
+        if content.has_media:
             image_analysis = await self._analyze_image(
                 content.image_url or (content.media_urls[0] if content.media_urls else None)
             )
@@ -86,6 +87,21 @@ class MLScoringService:
             processing_time_ms=processing_time
         )
     
+    async def score_content_batch(
+        self, 
+        contents: List[Content]
+    ) -> List[Union[MLScoringResult, BaseException]]:
+        """
+        Score a batch of content in one call.
+        An item that fails gets its exception in place of a result, so it
+        doesn't fail the rest of the batch.
+        SIMULATED - In production, send a single batched SageMaker invocation.
+        """
+        return list(await asyncio.gather(
+            *(self.score_content(c) for c in contents),
+            return_exceptions=True
+        ))
+    
     async def _score_text(self, text: Optional[str]) -> MLScores:
         """
         Score text content using NLP model.
@@ -254,3 +270,92 @@ class MLScoringService:
             return 0.0
         
         return (pos_count - neg_count) / (pos_count + neg_count)
+
+
+class MLScoringBatcher:
+    """
+    Micro-batches concurrent score_content calls into score_content_batch.
+    
+    A batch is flushed when it reaches batch_size or when max_latency_ms has
+    elapsed since its first item. max_latency_ms=0 coalesces callers that
+    submit within the same event loop iteration without adding any delay.
+    """
+    
+    def __init__(
+        self,
+        ml_service: MLScoringService,
+        batch_size: int = 32,
+        max_latency_ms: float = 10.0
+    ):
+        self.ml_service = ml_service
+        self.batch_size = batch_size
+        self.max_latency_ms = max_latency_ms
+        
+        self._pending: List[Tuple[Content, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, content: Content) -> MLScoringResult:
+        """Queue content for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Callers may use a fresh loop per request (asyncio.run); never
+            # carry pending work or timers over from a previous loop.
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+        
+        future = loop.create_future()
+        self._pending.append((content, future))
+        
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.max_latency_ms > 0:
+                self._flush_handle = loop.call_later(self.max_latency_ms / 1000, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Dispatch all pending items as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        task = self._loop.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[Content, asyncio.Future]]) -> None:
+        """Score a batch and resolve each caller's future."""
+        try:
+            results = await self.ml_service.score_content_batch([c for c, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, asyncio.CancelledError):
+                    future.cancel()
+                elif isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Never leave a caller waiting, e.g. on a short result list
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("ML scoring batch returned no result for this item"))
@@ -19,7 +19,7 @@ from models.enums import (
 from models.review import ReviewTask, DEFAULT_SLAS
 
 from services.triage_service import TriageService, TriageResult
-from services.ml_scoring_service import MLScoringService, MLScoringResult
+from services.ml_scoring_service import MLScoringService, MLScoringResult, MLScoringBatcher
 from services.reputation_service import ReputationService
 
 
@@ -52,10 +52,35 @@ class ModerationService:
     FAST_APPROVE_REPUTATION_THRESHOLD = 80
     ML_REQUIRED_CONFIDENCE_THRESHOLD = 0.85
     HUMAN_REVIEW_THRESHOLD = 0.6
+    HIGH_SEVERITY_REJECT_RISK = 0.7
+    
+    # ML micro-batching: flush at ML_BATCH_SIZE items or after
+    # ML_BATCH_WINDOW_MS. 0 batches only callers that are already concurrent;
+    # raise to 5-10ms when scoring against a remote endpoint.
+    ML_BATCH_SIZE = 32
+    ML_BATCH_WINDOW_MS = 0.0
+    
+    # Final decision indexed by [severity][combined_risk > HIGH_SEVERITY_REJECT_RISK]
+    DECISION_TABLE = (
+        # NONE / LOW: approve (borderline cases default to approved)
+        (ContentStatus.APPROVED, ContentStatus.APPROVED),
+        (ContentStatus.APPROVED, ContentStatus.APPROVED),
+        # MEDIUM: quarantine for review
+        (ContentStatus.QUARANTINED, ContentStatus.QUARANTINED),
+        # HIGH: reject only with high confidence
+        (ContentStatus.APPROVED, ContentStatus.REJECTED),
+        # CRITICAL: always reject
+        (ContentStatus.REJECTED, ContentStatus.REJECTED),
+    )
     
     def __init__(self):
         self.triage_service = TriageService()
         self.ml_service = MLScoringService()
+        self.ml_batcher = MLScoringBatcher(
+            self.ml_service,
+            batch_size=self.ML_BATCH_SIZE,
+            max_latency_ms=self.ML_BATCH_WINDOW_MS
+        )
         self.reputation_service = ReputationService()
         
         # Metrics tracking
@@ -79,8 +104,11 @@ class ModerationService:
         risk_profile = self.reputation_service.get_risk_profile(content.user_id)
         routing_path.append(f"risk_assessment:{risk_profile.risk_level.value}")
         
-        # Step 2: Check for fast-track approval (trusted users)
-        if self._can_fast_approve(risk_profile, content):
+        # Step 2: Check for fast-track approval (trusted users, text-only,
+        # not bursting). Inlined: this is the hottest path for approved traffic.
+        if (risk_profile.fast_track_approved
+                and not risk_profile.is_bursting
+                and not content.has_media):
             routing_path.append("fast_approve")
             result = self._create_fast_approval(content)
             self.reputation_service.record_approval(content.user_id)
@@ -108,7 +136,7 @@ class ModerationService:
         
         # Step 4: Tier 2 - ML Scoring
         routing_path.append("tier2_ml")
-        ml_result = await self.ml_service.score_content(content)
+        ml_result = await self.ml_batcher.submit(content)
         
         # Step 5: Combine scores and make decision
         combined_result = self._combine_scores(
@@ -150,22 +178,6 @@ class ModerationService:
             total_processing_time_ms=self._calc_time_ms(start_time)
         )
     
-    def _can_fast_approve(self, risk_profile: UserRiskProfile, content: Content) -> bool:
-        """Check if content can be fast-tracked for approval."""
-        # Only fast approve for trusted users with text-only content
-        if not risk_profile.fast_track_approved:
-            return False
-        
-        # Don't fast approve images or media
-        if content.image_url or content.media_urls:
-            return False
-        
-        # Don't fast approve if user is bursting
-        if risk_profile.is_bursting:
-            return False
-        
-        return True
-    
     def _create_fast_approval(self, content: Content) -> ModerationResult:
         """Create fast approval result for trusted users."""
         return ModerationResult(
@@ -202,12 +214,10 @@ class ModerationService:
         # Combine violations
         all_violations = list(set(triage_result.violations + ml_result.detected_violations))
         
-        # Take maximum severity
-        max_severity = max(
-            triage_result.severity,
-            ml_result.recommended_severity,
-            key=lambda x: x.value
-        )
+        # Take maximum severity (SeverityLevel is an IntEnum: compare directly)
+        triage_severity = triage_result.severity
+        ml_severity = ml_result.recommended_severity
+        max_severity = triage_severity if triage_severity >= ml_severity else ml_severity
         
         return ModerationResult(
             content_id=content.id,
@@ -225,24 +235,9 @@ class ModerationService:
     
     def _make_final_decision(self, result: ModerationResult) -> ContentStatus:
         """Make final moderation decision based on combined scores."""
-        # Critical severity = always reject
-        if result.severity == SeverityLevel.CRITICAL:
-            return ContentStatus.REJECTED
-        
-        # High severity with high confidence = reject
-        if result.severity == SeverityLevel.HIGH and result.combined_risk_score > 0.7:
-            return ContentStatus.REJECTED
-        
-        # Medium severity = quarantine for review
-        if result.severity == SeverityLevel.MEDIUM:
-            return ContentStatus.QUARANTINED
-        
-        # Low risk = approve
-        if result.combined_risk_score < 0.3:
-            return ContentStatus.APPROVED
-        
-        # Default to approved for borderline cases
-        return ContentStatus.APPROVED
+        return self.DECISION_TABLE[result.severity][
+            result.combined_risk_score > self.HIGH_SEVERITY_REJECT_RISK
+        ]
     
     def _create_review_task(
         self,
@@ -6,10 +6,12 @@ Target latency: <10ms
 
 import asyncio
 import hashlib
+import re
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set, Tuple
 from uuid import UUID
-from collections import defaultdict
+from collections import Counter, OrderedDict, defaultdict
 from dataclasses import dataclass, field
 
 from models.realtime import (
@@ -23,24 +25,39 @@ from models.enums import (
 from services.reputation_service import ReputationService
 
 
-@dataclass
+@dataclass(slots=True)
 class UserWindow:
-    """Sliding window state for a user."""
+    """Sliding window state for a user (slotted: one per active user)."""
     user_id: UUID
-    messages: List[Tuple[datetime, str]] = field(default_factory=list)
-    message_hashes: Set[str] = field(default_factory=set)
+    messages: List[Tuple[datetime, str, str]] = field(default_factory=list)
+    hash_counts: Counter = field(default_factory=Counter)
     violation_count: int = 0
     last_message_time: Optional[datetime] = None
     
     def add_message(self, timestamp: datetime, text: str, hash_val: str):
-        self.messages.append((timestamp, text))
-        self.message_hashes.add(hash_val)
+        self.messages.append((timestamp, text, hash_val))
+        self.hash_counts[hash_val] += 1
         self.last_message_time = timestamp
     
-    def cleanup_old(self, window_size_seconds: int):
-        """Remove messages outside the window."""
-        cutoff = datetime.utcnow() - timedelta(seconds=window_size_seconds)
-        self.messages = [(t, m) for t, m in self.messages if t > cutoff]
+    def cleanup_old(self, window_size_seconds: int, now: Optional[datetime] = None):
+        """
+        Remove messages outside the window.
+        Messages are appended in arrival order, so expired entries form a
+        prefix and the cost is proportional to the number expired.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=window_size_seconds)
+        expired = 0
+        for entry in self.messages:
+            if entry[0] > cutoff:
+                break
+            # Expired message: drop its hash from the duplicate counter
+            hash_val = entry[2]
+            self.hash_counts[hash_val] -= 1
+            if self.hash_counts[hash_val] <= 0:
+                del self.hash_counts[hash_val]
+            expired += 1
+        if expired:
+            del self.messages[:expired]
 
 
 class RealTimeService:
@@ -62,6 +79,9 @@ class RealTimeService:
         'link_spam': 3,           # 3+ links in message
     }
     
+    # Matches both http:// and https:// in a single scan
+    LINK_REGEX = re.compile(r'https?://')
+    
     # Rate limits
     RATE_LIMITS = {
         'messages_per_minute': 10,
@@ -82,6 +102,9 @@ class RealTimeService:
         )
         self.channel_states: Dict[str, ChannelState] = {}
         
+        # Users ordered by last activity (oldest first) for O(expired) eviction
+        self._user_lru: "OrderedDict[UUID, datetime]" = OrderedDict()
+        
         # Blocklist (fast lookup)
         self.blocked_phrases: Set[str] = {
             'buy followers', 'free robux', 'click my link'
@@ -100,7 +123,10 @@ class RealTimeService:
         Process a live chat message with <10ms latency target.
         Implements Flink-style stateful processing.
         """
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
+        # Single wall-clock read shared by every window computation below
+        now = datetime.utcnow()
+        cutoff_1m = now - timedelta(seconds=self.WINDOW_1M)
         
         # Initialize decision
         decision = FlinkDecision(
@@ -112,21 +138,22 @@ class RealTimeService:
         )
         
         # Step 1: Update user window state
-        user_window = self._get_or_create_window(message.user_id)
+        user_window = self._get_or_create_window(message.user_id, now)
         message_hash = self._hash_message(message.text)
         
         # Step 2: Fast-path checks (parallel in production)
         spam_score = self._check_spam_patterns(message.text)
         toxicity_score = self._check_toxicity_fast(message.text)
-        is_duplicate = message_hash in user_window.message_hashes
-        is_rate_limited = self._check_rate_limit(user_window)
+        repeat_count = user_window.hash_counts.get(message_hash, 0)
+        is_duplicate = repeat_count > 0
+        prior_count_1m = self._count_since(user_window, cutoff_1m)
+        is_rate_limited = prior_count_1m >= self.RATE_LIMITS['messages_per_minute']
         
         # Step 3: Update window
         user_window.add_message(message.timestamp, message.text, message_hash)
         
         # Step 4: Compute windowed metrics
-        msg_count_1m = len([m for t, m in user_window.messages 
-                           if t > datetime.utcnow() - timedelta(seconds=60)])
+        msg_count_1m = prior_count_1m + (message.timestamp > cutoff_1m)
         msg_count_5m = len(user_window.messages)
         
         # Step 5: Burst detection
@@ -147,7 +174,8 @@ class RealTimeService:
             severity = max(severity, SeverityLevel.HIGH)
             should_block = True
         
-        if is_duplicate and user_window.message_hashes.__len__() > self.RATE_LIMITS['duplicate_threshold']:
+        # Same message seen duplicate_threshold+ times (including this one)
+        if repeat_count + 1 >= self.RATE_LIMITS['duplicate_threshold']:
             violations.append(ViolationType.SPAM)
             severity = max(severity, SeverityLevel.LOW)
             should_block = True
@@ -166,7 +194,7 @@ class RealTimeService:
             should_block = True
         
         # Calculate processing time
-        processing_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        processing_time_ms = int((time.perf_counter() - start_time) * 1000)
         
         # Build final decision
         decision.decision = ContentStatus.REJECTED if should_block else ContentStatus.APPROVED
@@ -186,15 +214,22 @@ class RealTimeService:
         
         # Cleanup old messages periodically
         if self.metrics['messages_processed'] % 100 == 0:
-            self._cleanup_windows()
+            self._cleanup_windows(now)
         
         return decision
     
-    def _get_or_create_window(self, user_id: UUID) -> UserWindow:
-        """Get or create user window state."""
-        if user_id not in self.user_windows:
-            self.user_windows[user_id] = UserWindow(user_id=user_id)
-        return self.user_windows[user_id]
+    def _get_or_create_window(self, user_id: UUID, now: Optional[datetime] = None) -> UserWindow:
+        """Get or create user window state, marking the user as recently active."""
+        now = now or datetime.utcnow()
+        window = self.user_windows.get(user_id)
+        if window is None:
+            window = self.user_windows[user_id] = UserWindow(user_id=user_id)
+        else:
+            window.cleanup_old(self.WINDOW_5M, now)
+        
+        self._user_lru[user_id] = now
+        self._user_lru.move_to_end(user_id)
+        return window
     
     def _hash_message(self, text: str) -> str:
         """Create hash of message for duplicate detection."""
@@ -225,7 +260,7 @@ class RealTimeService:
                 score += 0.3
         
         # Check for excessive links
-        link_count = text.count('http://') + text.count('https://')
+        link_count = len(self.LINK_REGEX.findall(text))
         if link_count >= self.SPAM_PATTERNS['link_spam']:
             score += 0.4
         
@@ -242,11 +277,9 @@ class RealTimeService:
         matches = sum(1 for word in toxic_words if word in text_lower)
         return min(1.0, matches * 0.25)
     
-    def _check_rate_limit(self, window: UserWindow) -> bool:
-        """Check if user exceeds rate limit."""
-        msg_count_1m = len([m for t, m in window.messages 
-                           if t > datetime.utcnow() - timedelta(seconds=60)])
-        return msg_count_1m >= self.RATE_LIMITS['messages_per_minute']
+    def _count_since(self, window: UserWindow, cutoff: datetime) -> int:
+        """Count window messages newer than cutoff."""
+        return sum(1 for entry in window.messages if entry[0] > cutoff)
     
     def _detect_burst(self, window: UserWindow, channel_id: str) -> bool:
         """Detect burst activity from user."""
@@ -254,7 +287,7 @@ class RealTimeService:
             return False
         
         # Check message velocity
-        recent = [t for t, _ in window.messages[-10:]]
+        recent = [entry[0] for entry in window.messages[-10:]]
         if len(recent) >= 2:
             time_span = (recent[-1] - recent[0]).total_seconds()
             if time_span > 0:
@@ -268,10 +301,19 @@ class RealTimeService:
         text_lower = text.lower()
         return any(phrase in text_lower for phrase in self.blocked_phrases)
     
-    def _cleanup_windows(self) -> None:
-        """Clean up old window data to prevent memory bloat."""
-        for window in self.user_windows.values():
-            window.cleanup_old(self.WINDOW_5M)
+    def _cleanup_windows(self, now: Optional[datetime] = None) -> None:
+        """
+        Evict windows of users inactive for longer than the 5 minute window.
+        Active windows are pruned on access, so only the stale front of the
+        LRU queue is visited.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=self.WINDOW_5M)
+        while self._user_lru:
+            user_id, last_seen = next(iter(self._user_lru.items()))
+            if last_seen > cutoff:
+                break
+            del self._user_lru[user_id]
+            self.user_windows.pop(user_id, None)
     
     def _update_metrics(self, processing_time_ms: int, blocked: bool) -> None:
         """Update service metrics."""
@@ -4,14 +4,60 @@ Manages user reputation scores for risk-based routing.
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from uuid import UUID
 import math
+import time
 
-from models.user import User, ReputationScore, UserRiskProfile, ViolationHistory
+import numpy as np
+
+from models.user import User, ReputationScore, UserRiskProfile, ViolationHistory, to_epoch_seconds
 from models.enums import UserRiskLevel, ViolationType, SeverityLevel
 
 
+def _reputation_kernel(
+    approved_posts: int,
+    total_posts: int,
+    approval_rate: float,
+    account_age_days: int,
+    decayed_violation_score: float,
+    seconds_since_decay: float,
+    community_standing: float,
+    weights: Tuple[float, float, float, float],
+    decay_seconds: float
+) -> Tuple[float, float, float, float]:
+    """
+    Reputation arithmetic on plain scalars.
+    Returns (overall_score, approval_rate, account_age_factor, violation_score).
+    weights are (approval_rate, account_age, violation_history, community_standing).
+    decayed_violation_score is the violation impact as of seconds_since_decay ago.
+    """
+    # 1. Approval rate component (unchanged until the user has posted)
+    if total_posts > 0:
+        approval_rate = approved_posts / total_posts
+    
+    # 2. Account age factor (0-100, maxes out at 1 year)
+    account_age_factor = min(100, account_age_days / 3.65)
+    
+    # 3. Violation impact, decayed to now in closed form
+    violation_score = 0.0
+    if decayed_violation_score:
+        violation_score = min(
+            100, decayed_violation_score * math.exp(-max(0.0, seconds_since_decay) / decay_seconds)
+        )
+    
+    # 4. Weighted overall score
+    w_approval, w_age, w_violation, w_community = weights
+    overall_score = (
+        approval_rate * 100 * w_approval +
+        account_age_factor * w_age +
+        (100 - violation_score) * w_violation +
+        community_standing * w_community
+    )
+    
+    return overall_score, approval_rate, account_age_factor, violation_score
+
+
 class ReputationService:
     """
     Manages user reputation for moderation routing.
@@ -25,9 +71,20 @@ class ReputationService:
         'violation_history': 0.3,
         'community_standing': 0.2,
     }
+    _KERNEL_WEIGHTS = (
+        WEIGHTS['approval_rate'],
+        WEIGHTS['account_age'],
+        WEIGHTS['violation_history'],
+        WEIGHTS['community_standing'],
+    )
     
     # Decay factors
     VIOLATION_DECAY_DAYS = 90  # Violations decay over 90 days
+    VIOLATION_DECAY_SECONDS = VIOLATION_DECAY_DAYS * 86400
+    
+    # Account age and violation decay move with the clock: a cached score
+    # is recalculated once it is this old, even with unchanged inputs
+    SCORE_TTL_SECONDS = 3600
     REPUTATION_RECOVERY_RATE = 0.01  # Per day
     
     # Thresholds
@@ -36,10 +93,91 @@ class ReputationService:
     WATCH_THRESHOLD = 30
     RESTRICTED_THRESHOLD = 10
     
+    # Automatic sanctions indexed by min(violations in last 30 days, 5):
+    # (ban_days, mute_hours, risk_level, rate_limit_multiplier)
+    SANCTION_TABLE = (
+        (0, 0, None, None),
+        (0, 0, None, None),
+        (0, 0, UserRiskLevel.WATCH, 2.0),
+        (0, 24, UserRiskLevel.RESTRICTED, None),
+        (0, 24, UserRiskLevel.RESTRICTED, None),
+        (30, 0, None, None),
+    )
+    
+    # Rate limits per risk level: (posts per minute, posts per hour)
+    RATE_LIMITS = {
+        UserRiskLevel.TRUSTED: (20, 200),
+        UserRiskLevel.NORMAL: (10, 100),
+        UserRiskLevel.WATCH: (5, 50),
+        UserRiskLevel.RESTRICTED: (2, 20),
+        UserRiskLevel.BANNED: (0, 0),
+    }
+    
+    # Initial capacity of the columnar store (doubles when full)
+    INITIAL_COLUMN_CAPACITY = 1024
+    
     def __init__(self):
         # In-memory store (replace with database in production)
         self.users: Dict[UUID, User] = {}
         self.reputation_cache: Dict[UUID, ReputationScore] = {}
+        
+        # Columnar (SoA) copy of the numeric reputation inputs, indexed by a
+        # dense per-user index, for vectorized bulk recomputes. User objects
+        # remain the source of truth: rows are re-synced from them before a
+        # recompute. Only the dirty flags used to pick rows for
+        # recompute_all_dirty_users depend on mutation going through the service.
+        self._user_index: Dict[UUID, int] = {}
+        self._users_by_index: List[User] = []
+        self._allocate_columns(self.INITIAL_COLUMN_CAPACITY)
+    
+    def _allocate_columns(self, capacity: int) -> None:
+        """Allocate (or grow) the reputation columns to capacity rows."""
+        columns = {
+            '_col_approved': np.int32,
+            '_col_total': np.int32,
+            '_col_created': np.int64,
+            '_col_community': np.float64,
+            '_col_approval_rate': np.float64,
+            '_col_decayed_violation': np.float64,
+            '_col_decayed_at': np.int64,
+            '_col_overall': np.float64,
+            '_col_scored_at': np.int64,
+            '_col_dirty': np.bool_,
+        }
+        size = len(self._users_by_index)
+        for name, dtype in columns.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if size:
+                column[:size] = getattr(self, name)[:size]
+            setattr(self, name, column)
+    
+    def _register_user(self, user: User) -> None:
+        """Add a user to the store and assign its column index."""
+        idx = len(self._users_by_index)
+        if idx == len(self._col_overall):
+            self._allocate_columns(2 * idx)
+        
+        self.users[user.id] = user
+        self._user_index[user.id] = idx
+        self._users_by_index.append(user)
+        self._sync_columns(user)
+    
+    def _sync_columns(self, user: User) -> None:
+        """Copy a user's mutable reputation fields into the columns."""
+        idx = self._user_index[user.id]
+        reputation = user.reputation
+        self._col_created[idx] = to_epoch_seconds(user.created_at)
+        self._col_approved[idx] = reputation.approved_posts
+        self._col_total[idx] = reputation.total_posts
+        self._col_community[idx] = reputation.community_standing
+        self._col_approval_rate[idx] = reputation.approval_rate
+        self._col_overall[idx] = reputation.overall_score
+        self._col_scored_at[idx] = reputation._scored_at
+        (
+            self._col_decayed_violation[idx],
+            self._col_decayed_at[idx],
+        ) = reputation.decayed_violations(self.VIOLATION_DECAY_SECONDS)
+        self._col_dirty[idx] = reputation.is_stale
     
     def get_user(self, user_id: UUID) -> Optional[User]:
         """Get user by ID."""
@@ -55,59 +193,129 @@ class ReputationService:
                 account_age_factor=0.0,  # New account
             )
         )
-        self.users[user.id] = user
+        self._register_user(user)
         return user
     
     def calculate_reputation(self, user_id: UUID) -> ReputationScore:
-        """Calculate comprehensive reputation score for a user."""
+        """
+        Calculate comprehensive reputation score for a user.
+        Returns the cached score unless its inputs changed since the last call
+        or it is older than SCORE_TTL_SECONDS.
+        """
         user = self.users.get(user_id)
         if not user:
             return ReputationScore()
         
         reputation = user.reputation
+        now_ts = int(time.time())
+        if not reputation.is_stale and now_ts - reputation._scored_at < self.SCORE_TTL_SECONDS:
+            return reputation
         
-        # 1. Calculate approval rate component
-        if reputation.total_posts > 0:
-            reputation.approval_rate = reputation.approved_posts / reputation.total_posts
-        
-        # 2. Calculate account age factor (0-100, maxes out at 1 year)
-        account_age_days = (datetime.utcnow() - user.created_at).days
-        reputation.account_age_factor = min(100, account_age_days / 3.65)
-        
-        # 3. Calculate violation impact with decay
-        violation_score = self._calculate_violation_impact(reputation.violation_history)
+        created_ts = to_epoch_seconds(user.created_at)
+        decayed_violation, decayed_at = reputation.decayed_violations(self.VIOLATION_DECAY_SECONDS)
         
-        # 4. Calculate overall score
-        reputation.overall_score = (
-            reputation.approval_rate * 100 * self.WEIGHTS['approval_rate'] +
-            reputation.account_age_factor * self.WEIGHTS['account_age'] +
-            (100 - violation_score) * self.WEIGHTS['violation_history'] +
-            reputation.community_standing * self.WEIGHTS['community_standing']
+        overall_score, approval_rate, account_age_factor, _ = _reputation_kernel(
+            reputation.approved_posts,
+            reputation.total_posts,
+            reputation.approval_rate,
+            (now_ts - created_ts) // 86400,
+            decayed_violation,
+            now_ts - decayed_at,
+            reputation.community_standing,
+            self._KERNEL_WEIGHTS,
+            self.VIOLATION_DECAY_SECONDS,
         )
         
+        reputation.approval_rate = approval_rate
+        reputation.account_age_factor = account_age_factor
+        reputation.overall_score = overall_score
         reputation.last_updated = datetime.utcnow()
+        reputation._dirty = False
+        reputation._scored_at = now_ts
         self.reputation_cache[user_id] = reputation
+        self._sync_columns(user)
         
         return reputation
     
-    def _calculate_violation_impact(self, violations: List[ViolationHistory]) -> float:
+    def recompute_all(self) -> None:
         """
-        Calculate violation impact with time decay.
-        Recent violations have more impact than old ones.
+        Recompute every user's reputation in one vectorized pass over the
+        columns, then write the results back to the User objects.
+        Same formula as _reputation_kernel.
         """
-        if not violations:
-            return 0.0
+        n = len(self._users_by_index)
+        if n == 0:
+            return
         
-        total_impact = 0.0
-        now = datetime.utcnow()
+        self._recompute_rows(np.arange(n))
+    
+    def recompute_all_dirty_users(self) -> int:
+        """
+        Recompute only users whose inputs changed through this service since
+        their last calculation, or whose score is older than SCORE_TTL_SECONDS
+        (e.g. once per simulation tick). Users changed directly, not through
+        a service mutator, are picked up by recompute_all instead.
+        Returns the number of users recomputed.
+        """
+        n = len(self._users_by_index)
+        expired = int(time.time()) - self._col_scored_at[:n] >= self.SCORE_TTL_SECONDS
+        dirty_idx = np.flatnonzero(self._col_dirty[:n] | expired)
+        if len(dirty_idx):
+            self._recompute_rows(dirty_idx)
+        return len(dirty_idx)
+    
+    def _recompute_rows(self, rows: np.ndarray) -> None:
+        """Vectorized reputation recompute for the given column indices."""
+        now_ts = int(time.time())
+        users = [self._users_by_index[idx] for idx in rows.tolist()]
+        
+        # Re-read inputs from the objects, including changes made directly on
+        # them and violations appended outside record_violation
+        for user in users:
+            self._sync_columns(user)
+        
+        approved = self._col_approved[rows]
+        total = self._col_total[rows]
         
-        for violation in violations:
-            days_ago = (now - violation.timestamp).days
-            decay_factor = math.exp(-days_ago / self.VIOLATION_DECAY_DAYS)
-            severity_weight = violation.severity * 10  # Higher severity = more impact
-            total_impact += severity_weight * decay_factor
+        approval_rate = np.where(
+            total > 0, approved / np.maximum(total, 1), self._col_approval_rate[rows]
+        )
+        account_age_factor = np.minimum(100, ((now_ts - self._col_created[rows]) // 86400) / 3.65)
+        
+        # Decay each user's running violation impact to now
+        seconds_since_decay = np.maximum(0, now_ts - self._col_decayed_at[rows])
+        violation_score = np.minimum(
+            100,
+            self._col_decayed_violation[rows] * np.exp(-seconds_since_decay / self.VIOLATION_DECAY_SECONDS)
+        )
         
-        return min(100, total_impact)
+        w_approval, w_age, w_violation, w_community = self._KERNEL_WEIGHTS
+        overall = (
+            approval_rate * 100 * w_approval +
+            account_age_factor * w_age +
+            (100 - violation_score) * w_violation +
+            self._col_community[rows] * w_community
+        )
+        
+        self._col_approval_rate[rows] = approval_rate
+        self._col_overall[rows] = overall
+        self._col_scored_at[rows] = now_ts
+        self._col_dirty[rows] = False
+        
+        # Write back to the object view
+        updated_at = datetime.utcnow()
+        for user, rate, age, score in zip(
+            users, approval_rate.tolist(),
+            account_age_factor.tolist(), overall.tolist()
+        ):
+            reputation = user.reputation
+            reputation.approval_rate = rate
+            reputation.account_age_factor = age
+            reputation.overall_score = score
+            reputation.last_updated = updated_at
+            reputation._dirty = False
+            reputation._scored_at = now_ts
+            self.reputation_cache[user.id] = reputation
     
     def record_violation(
         self, 
@@ -122,21 +330,25 @@ class ReputationService:
         if not user:
             return
         
+        now_ts = time.time()
+        now = datetime.utcfromtimestamp(now_ts)
         violation = ViolationHistory(
             violation_type=violation_type,
             severity=severity,
             content_id=content_id,
-            timestamp=datetime.utcnow(),
+            timestamp=now,
+            timestamp_epoch=int(now_ts),
             action_taken=action_taken
         )
         
         user.reputation.violation_history.append(violation)
         user.reputation.total_violations += 1
         user.reputation.violations_last_30_days += 1
-        user.reputation.last_violation = datetime.utcnow()
+        user.reputation.last_violation = now
         user.reputation.rejected_posts += 1
+        user.reputation.mark_dirty()
         
-        # Recalculate reputation
+        # Recalculate reputation (needed for the risk level below)
         self.calculate_reputation(user_id)
         
         # Update risk level
@@ -160,7 +372,9 @@ class ReputationService:
             user.reputation.overall_score + 0.1
         )
         
-        self.calculate_reputation(user_id)
+        # Recalculated lazily on the next read
+        user.reputation.mark_dirty()
+        self._sync_columns(user)
     
     def _apply_automatic_sanctions(
         self, 
@@ -177,18 +391,21 @@ class ReputationService:
         
         # Check for repeat offenders
         recent_violations = user.reputation.violations_last_30_days
+        ban_days, mute_hours, risk_level, rate_multiplier = self.SANCTION_TABLE[
+            min(recent_violations, len(self.SANCTION_TABLE) - 1)
+        ]
         
-        if recent_violations >= 5:
+        if ban_days:
             user.is_banned = True
-            user.banned_until = datetime.utcnow() + timedelta(days=30)
+            user.banned_until = datetime.utcnow() + timedelta(days=ban_days)
             user.ban_reason = "Repeated violations"
-        elif recent_violations >= 3:
+        if mute_hours:
             user.is_muted = True
-            user.muted_until = datetime.utcnow() + timedelta(hours=24)
-            user.risk_level = UserRiskLevel.RESTRICTED
-        elif recent_violations >= 2:
-            user.risk_level = UserRiskLevel.WATCH
-            user.rate_limit_multiplier = 2.0
+            user.muted_until = datetime.utcnow() + timedelta(hours=mute_hours)
+        if risk_level is not None:
+            user.risk_level = risk_level
+        if rate_multiplier is not None:
+            user.rate_limit_multiplier = rate_multiplier
     
     def get_risk_profile(self, user_id: UUID) -> UserRiskProfile:
         """Get computed risk profile for routing decisions."""
@@ -205,6 +422,7 @@ class ReputationService:
         
         # Calculate risk score (0 = trusted, 1 = high risk)
         risk_score = 1 - (reputation.overall_score / 100)
+        max_per_hour = self._get_rate_limit(risk_level, 'hour')
         
         return UserRiskProfile(
             user_id=user_id,
@@ -214,21 +432,15 @@ class ReputationService:
             fast_track_approved=risk_level == UserRiskLevel.TRUSTED,
             shadow_banned=user.is_banned and user.banned_until is None,
             max_posts_per_minute=self._get_rate_limit(risk_level, 'minute'),
-            max_posts_per_hour=self._get_rate_limit(risk_level, 'hour'),
+            max_posts_per_hour=max_per_hour,
             current_velocity=reputation.posts_last_hour / 60,
-            is_bursting=reputation.posts_last_hour > self._get_rate_limit(risk_level, 'hour') * 0.5
+            is_bursting=reputation.posts_last_hour > max_per_hour * 0.5
         )
     
     def _get_rate_limit(self, risk_level: UserRiskLevel, period: str) -> int:
         """Get rate limit based on risk level."""
-        limits = {
-            UserRiskLevel.TRUSTED: {'minute': 20, 'hour': 200},
-            UserRiskLevel.NORMAL: {'minute': 10, 'hour': 100},
-            UserRiskLevel.WATCH: {'minute': 5, 'hour': 50},
-            UserRiskLevel.RESTRICTED: {'minute': 2, 'hour': 20},
-            UserRiskLevel.BANNED: {'minute': 0, 'hour': 0},
-        }
-        return limits.get(risk_level, limits[UserRiskLevel.NORMAL])[period]
+        per_minute, per_hour = self.RATE_LIMITS.get(risk_level, self.RATE_LIMITS[UserRiskLevel.NORMAL])
+        return per_minute if period == 'minute' else per_hour
     
     def update_velocity(self, user_id: UUID) -> None:
         """Update user's posting velocity metrics."""
@@ -244,5 +456,7 @@ class ReputationService:
         reputation.posts_last_day += 1
         reputation.posts_last_week += 1
         reputation.total_posts += 1
+        reputation.mark_dirty()
+        self._sync_columns(user)
         
         # In production, use time-windowed counters with TTL
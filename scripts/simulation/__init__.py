@@ -22,23 +22,23 @@ Usage:
     asyncio.run(runner.run())
 """
 
-import os
-import sys
-
-# Ensure scripts directory is in path for imports
-_scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if _scripts_dir not in sys.path:
-    sys.path.insert(0, _scripts_dir)
-
-from simulation.content_generator import ContentGenerator, ContentScenario, SCENARIOS
-from simulation.realtime_chat_simulator import (
-    RealtimeChatSimulator,
-    SimulationConfig,
-    ChatPattern,
-    ChatChannel,
-    ChatMessageGenerator,
-)
-from simulation.pipeline_runner import PipelineRunner, PipelineConfig, MetricsCollector
+import importlib
+
+# Submodules are imported on first attribute access (PEP 562), so importing
+# the package does not pull in the moderation stack until it is needed.
+_LAZY_ATTRS = {
+    'ContentGenerator': '.content_generator',
+    'ContentScenario': '.content_generator',
+    'SCENARIOS': '.content_generator',
+    'RealtimeChatSimulator': '.realtime_chat_simulator',
+    'SimulationConfig': '.realtime_chat_simulator',
+    'ChatPattern': '.realtime_chat_simulator',
+    'ChatChannel': '.realtime_chat_simulator',
+    'ChatMessageGenerator': '.realtime_chat_simulator',
+    'PipelineRunner': '.pipeline_runner',
+    'PipelineConfig': '.pipeline_runner',
+    'MetricsCollector': '.pipeline_runner',
+}
 
 __all__ = [
     'ContentGenerator',
@@ -54,3 +54,16 @@ __all__ = [
     'MetricsCollector',
 ]
 
+
+def __getattr__(name):
+    """Import an exported name from its submodule on first access."""
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Include lazy exports in dir() for autocomplete."""
+    return sorted(set(globals()) | set(__all__))
@@ -3,16 +3,21 @@ Content Generator - Simulates realistic content for moderation pipeline testing
 Generates forum posts, images, profiles with various violation types
 """
 
+import bisect
+import itertools
 import random
+import re
 import uuid
 import time
 from datetime import datetime, timedelta
-from typing import List, Optional, Generator
+from typing import Dict, List, Optional, Generator, Sequence, Tuple
 from dataclasses import dataclass, field
 import json
 import os
 import sys
 
+import numpy as np
+
 # Ensure scripts directory is in path for imports
 _scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _scripts_dir not in sys.path:
@@ -34,6 +39,45 @@ class ContentScenario:
     image_categories: List[str] = field(default_factory=list)
 
 
+class _SimMeta:
+    """
+    Simulation ground truth attached to generated content as _sim_metadata.
+    Slotted to keep per-event allocation small; get() and [] keep the
+    dict-style access callers used before.
+    """
+    __slots__ = (
+        "scenario", "user_risk_type", "user_reputation",
+        "expected_violations", "expected_severity", "burst_attack",
+    )
+    
+    def __init__(
+        self,
+        scenario: str,
+        user_risk_type: str,
+        user_reputation: Optional[float] = None,
+        expected_violations: Optional[Tuple[str, ...]] = None,
+        expected_severity: Optional[int] = None,
+        burst_attack: bool = False,
+    ):
+        self.scenario = scenario
+        self.user_risk_type = user_risk_type
+        self.user_reputation = user_reputation
+        self.expected_violations = expected_violations
+        self.expected_severity = expected_severity
+        self.burst_attack = burst_attack
+    
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+    
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"_SimMeta({fields})"
+
+
 # Scenario definitions
 SCENARIOS = [
     ContentScenario(
@@ -173,37 +217,231 @@ TEMPLATE_FILLERS = {
     "adult_content": ["adult themes"],
     "inappropriate_bio": ["[Inappropriate content removed]"],
 }
+TEMPLATE_FILLERS_T = {key: tuple(values) for key, values in TEMPLATE_FILLERS.items()}
+
+# Template placeholder, e.g. {topic}
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+# Image CDN URL pieces; the per-category suffix is prebuilt per generator
+_IMG_PREFIX = "https://cdn.example.com/images/"
+
+
+def _build_alias(weights: Sequence[float]) -> Tuple[List[float], List[int]]:
+    """
+    Build a Walker alias table (Vose's method) for O(1) weighted draws.
+    Returns (prob, alias): pick column i uniformly, keep i with probability
+    prob[i], otherwise take alias[i].
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    
+    # Leftovers are 1.0 up to rounding error
+    return prob, alias
+
+
+def _generate_core(rng: np.random.Generator, n: int, tables: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized sampling core for generate_batch_fast.
+    Draws every per-event random decision for n events as integer/bool
+    arrays; string assembly and object construction are left to the caller.
+    """
+    # Scenario: vectorized Walker alias draw
+    col = rng.integers(0, len(tables["scenario_prob"]), n)
+    scenario = np.where(rng.random(n) < tables["scenario_prob"][col], col, tables["scenario_alias"][col])
+    
+    has_violation = rng.random(n) < tables["violation_prob"][scenario]
+    template = (rng.random(n) * tables["n_templates"][scenario]).astype(np.int64)
+    category = (rng.random(n) * tables["n_categories"][scenario]).astype(np.int64)
+    
+    # Severity: one uniform per event picks the alias column and its coin flip
+    u = rng.random(n) * tables["n_severities"][scenario]
+    sev_col = u.astype(np.int64)
+    severity = np.where(
+        u - sev_col < tables["severity_prob"][scenario, sev_col],
+        sev_col,
+        tables["severity_alias"][scenario, sev_col]
+    )
+    
+    # Users: risky rows for violation-prone scenarios, any row otherwise
+    risky_rows = tables["risky_rows"]
+    user_row = np.where(
+        tables["wants_risky"][scenario],
+        risky_rows[rng.integers(0, len(risky_rows), n)],
+        rng.integers(0, int(tables["n_users"]), n)
+    )
+    
+    ip_octets = rng.integers(0, 256, (n, 4), dtype=np.uint8)
+    ip_octets[:, 0] = np.maximum(ip_octets[:, 0], 1)
+    
+    return {
+        "scenario": scenario,
+        "has_violation": has_violation,
+        "template": template,
+        "category": category,
+        "severity": severity,
+        "user_row": user_row,
+        "ip_octets": ip_octets,
+        "agent_minor": rng.integers(0, 10, n),
+        "agent_patch": rng.integers(0, 100, n),
+        "region": rng.integers(0, int(tables["n_regions"]), n),
+    }
 
 
 class ContentGenerator:
     """Generates simulated content for the moderation pipeline"""
     
+    # Pre-formatted source IPs (2**IP_POOL_BITS entries, indexed by getrandbits)
+    IP_POOL_BITS = 12
+    GEO_LOCATIONS = ("us-east-1", "us-west-2", "eu-west-1", "ap-northeast-1")
+    
+    # Users that violating scenarios draw from
+    RISKY_USER_TYPES = frozenset({"suspicious", "high_risk", "new"})
+    
+    # Bit order of the violation masks reported by generate_batch_fast_with_stats
+    VIOLATION_TYPES = tuple(ViolationType)
+    
+    # Risk type codes used by the columnar user pool, with their population
+    # weights; the cumulative weights are sampled by bisection
+    RISK_TYPES = ("trusted", "normal", "new", "suspicious", "high_risk")
+    RISK_WEIGHTS = (0.30, 0.50, 0.10, 0.07, 0.03)
+    _RISK_CUM_WEIGHTS = tuple(itertools.accumulate(RISK_WEIGHTS))
+    
     def __init__(self, seed: Optional[int] = None):
-        if seed:
-            random.seed(seed)
+        # Dedicated RNG so generation neither disturbs nor depends on the
+        # module-level random state
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed)
         self.user_pool = self._create_user_pool(1000)
+        self._user_pool_t = tuple(self.user_pool)
+        self._risky_users = tuple(
+            u for u in self.user_pool if u["risk_type"] in self.RISKY_USER_TYPES
+        ) or self._user_pool_t
         self.scenario_weights = self._calculate_scenario_weights()
+        
+        # Templates pre-split into literal parts and filler slots
+        self._compiled_templates: Dict[str, Tuple[Tuple[str, ...], Tuple[Tuple[int, Tuple[str, ...]], ...]]] = {
+            template: self._compile_template(template)
+            for scenario in SCENARIOS
+            for template in scenario.text_templates
+        }
+        
+        # Metadata string pools, formatted once instead of per event
+        getrandbits = self._rng.getrandbits
+        self._ip_pool = tuple(
+            self._format_ip(getrandbits(32)) for _ in range(1 << self.IP_POOL_BITS)
+        )
+        self._cat_suffix = {
+            category: ".jpg?category=" + category
+            for scenario in SCENARIOS
+            for category in scenario.image_categories
+        }
+        self._ua_pool = tuple(
+            f"GameClient/1.{minor}.{patch}" for minor in range(10) for patch in range(100)
+        )
+        
+        # Alias tables so scenario and severity draws are O(1)
+        self._scenarios_tuple = tuple(SCENARIOS)
+        self._scenarios_by_name = {s.name: s for s in SCENARIOS}
+        # Shared expected-violation tuples, referenced by every event's _SimMeta
+        self._viol_tuples_by_scenario = {
+            s.name: tuple(v.value for v in s.violation_types) for s in SCENARIOS
+        }
+        self._scenario_prob, self._scenario_alias = _build_alias(self.scenario_weights)
+        self._severity_tables: Dict[int, Tuple[Tuple[SeverityLevel, ...], List[float], List[int]]] = {
+            id(scenario.severity_distribution): (
+                tuple(scenario.severity_distribution.keys()),
+                *_build_alias(list(scenario.severity_distribution.values())),
+            )
+            for scenario in SCENARIOS
+        }
+        
+        self._build_user_columns()
+        self._core_tables = self._build_core_tables()
+    
+    def _build_user_columns(self) -> None:
+        """
+        Build a struct-of-arrays copy of user_pool for bulk sampling in
+        generate_batch_fast. Content user UUIDs come from each user's user_uuid.
+        """
+        pool = self.user_pool
+        risk_codes = {risk_type: code for code, risk_type in enumerate(self.RISK_TYPES)}
+        self._users_soa = {
+            "content_user_id": np.array(
+                [u["user_uuid"] for u in pool],
+                dtype=object
+            ),
+            "risk_type": np.array([risk_codes[u["risk_type"]] for u in pool], dtype=np.uint8),
+            "reputation_score": np.array([u["reputation_score"] for u in pool], dtype=np.float64),
+            "account_age_days": np.array([u["account_age_days"] for u in pool], dtype=np.int32),
+            "violation_count": np.array([u["violation_count"] for u in pool], dtype=np.int32),
+        }
+        risky_mask = np.array([u["risk_type"] in self.RISKY_USER_TYPES for u in pool], dtype=bool)
+        self._risky_rows = np.flatnonzero(risky_mask)
+        if len(self._risky_rows) == 0:
+            self._risky_rows = np.arange(len(pool))
+    
+    def _build_core_tables(self) -> Dict[str, np.ndarray]:
+        """Integer/float lookup tables consumed by _generate_core"""
+        scenarios = self._scenarios_tuple
+        severity_tables = [self._severity_tables[id(s.severity_distribution)] for s in scenarios]
+        width = max(len(levels) for levels, _, _ in severity_tables)
+        severity_prob = np.ones((len(scenarios), width))
+        severity_alias = np.tile(np.arange(width), (len(scenarios), 1))
+        severity_values = np.zeros((len(scenarios), width), dtype=np.int8)
+        for row, (levels, prob, alias) in enumerate(severity_tables):
+            severity_prob[row, :len(prob)] = prob
+            severity_alias[row, :len(alias)] = alias
+            severity_values[row, :len(levels)] = [int(level) for level in levels]
+        
+        # Bit i set = scenario expects VIOLATION_TYPES[i]
+        violation_bits = {v: 1 << i for i, v in enumerate(self.VIOLATION_TYPES)}
+        violation_masks = [sum(violation_bits[v] for v in set(s.violation_types)) for s in scenarios]
+        
+        return {
+            "scenario_prob": np.array(self._scenario_prob),
+            "scenario_alias": np.array(self._scenario_alias),
+            "violation_prob": np.array([s.violation_probability for s in scenarios]),
+            "wants_risky": np.array([s.violation_probability > 0.5 for s in scenarios]),
+            "n_templates": np.array([len(s.text_templates) for s in scenarios]),
+            "n_categories": np.array([max(1, len(s.image_categories)) for s in scenarios]),
+            "n_severities": np.array([len(levels) for levels, _, _ in severity_tables]),
+            "severity_prob": severity_prob,
+            "severity_alias": severity_alias,
+            "severity_values": severity_values,
+            "violation_mask": np.array(violation_masks, dtype=np.int64),
+            "risky_rows": self._risky_rows,
+            "n_users": np.int64(len(self.user_pool)),
+            "n_regions": np.int64(len(self.GEO_LOCATIONS)),
+        }
     
     def _create_user_pool(self, size: int) -> List[dict]:
         """Create a pool of simulated users with varying risk profiles"""
         users = []
-        risk_distribution = {
-            "trusted": 0.30,
-            "normal": 0.50,
-            "new": 0.10,
-            "suspicious": 0.07,
-            "high_risk": 0.03
-        }
+        risk_types = self.RISK_TYPES
+        cum_weights = self._RISK_CUM_WEIGHTS
+        rand = self._rng.random
         
         for i in range(size):
-            risk_type = random.choices(
-                list(risk_distribution.keys()),
-                weights=list(risk_distribution.values())
-            )[0]
+            risk_type = risk_types[bisect.bisect_right(cum_weights, rand())]
             
+            hex_part = uuid.uuid4().hex[:8]
             users.append({
-                "user_id": f"user_{uuid.uuid4().hex[:8]}",
-                "username": f"player_{random.randint(1000, 99999)}",
+                "user_id": f"user_{hex_part}",
+                "user_uuid": uuid.UUID(hex_part.ljust(32, '0')),  # Content.user_id, parsed once
+                "username": f"player_{self._rng.randint(1000, 99999)}",
                 "risk_type": risk_type,
                 "reputation_score": self._get_reputation_for_risk(risk_type),
                 "account_age_days": self._get_account_age_for_risk(risk_type),
@@ -222,7 +460,7 @@ class ContentGenerator:
             "high_risk": (0.0, 0.25)
         }
         low, high = ranges[risk_type]
-        return round(random.uniform(low, high), 3)
+        return round(self._rng.uniform(low, high), 3)
     
     def _get_account_age_for_risk(self, risk_type: str) -> int:
         """Get account age in days based on risk type"""
@@ -234,7 +472,7 @@ class ContentGenerator:
             "high_risk": (0, 14)
         }
         low, high = ranges[risk_type]
-        return random.randint(low, high)
+        return self._rng.randint(low, high)
     
     def _get_violation_count_for_risk(self, risk_type: str) -> int:
         """Get violation count based on risk type"""
@@ -246,7 +484,7 @@ class ContentGenerator:
             "high_risk": (5, 20)
         }
         low, high = ranges[risk_type]
-        return random.randint(low, high)
+        return self._rng.randint(low, high)
     
     def _calculate_scenario_weights(self) -> List[float]:
         """Calculate weighted probabilities for scenario selection"""
@@ -263,65 +501,122 @@ class ContentGenerator:
         }
         return [weights.get(s.name, 0.1) for s in SCENARIOS]
     
+    @staticmethod
+    def _compile_template(
+        template: str
+    ) -> Tuple[Tuple[str, ...], Tuple[Tuple[int, Tuple[str, ...]], ...]]:
+        """
+        Split a template into (parts, slots): literal parts with placeholders
+        at odd indices, and (index, filler values) for each known placeholder.
+        Unknown placeholders are kept as literal text.
+        """
+        parts = _PLACEHOLDER_RE.split(template)
+        slots = []
+        for i in range(1, len(parts), 2):
+            key = parts[i]
+            if key in TEMPLATE_FILLERS_T:
+                slots.append((i, TEMPLATE_FILLERS_T[key]))
+            else:
+                parts[i] = "{" + key + "}"
+        return tuple(parts), tuple(slots)
+    
     def _fill_template(self, template: str) -> str:
         """Fill template placeholders with random values"""
-        result = template
-        for key, values in TEMPLATE_FILLERS.items():
-            placeholder = "{" + key + "}"
-            while placeholder in result:
-                result = result.replace(placeholder, random.choice(values), 1)
-        return result
+        compiled = self._compiled_templates.get(template)
+        if compiled is None:
+            compiled = self._compiled_templates[template] = self._compile_template(template)
+        
+        parts, slots = compiled
+        if not slots:
+            return "".join(parts)
+        filled = list(parts)
+        choice = self._rng.choice
+        for i, values in slots:
+            filled[i] = choice(values)
+        return "".join(filled)
+    
+    def _alias_draw(self, prob: List[float], alias: List[int]) -> int:
+        """Draw an index from a Walker alias table"""
+        rng = self._rng
+        i = rng.randrange(len(prob))
+        return i if rng.random() < prob[i] else alias[i]
     
     def _select_severity(self, distribution: dict) -> SeverityLevel:
         """Select severity based on distribution"""
-        levels = list(distribution.keys())
-        weights = list(distribution.values())
-        return random.choices(levels, weights=weights)[0]
+        table = self._severity_tables.get(id(distribution))
+        if table is None:
+            # Distribution not from SCENARIOS: build its table on demand
+            table = (tuple(distribution.keys()), *_build_alias(list(distribution.values())))
+        levels, prob, alias = table
+        return levels[self._alias_draw(prob, alias)]
+    
+    @staticmethod
+    def _format_ip(bits: int) -> str:
+        """Dotted IPv4 from one 32-bit draw; first octet kept in 1-255"""
+        return f"{(bits >> 24) % 255 + 1}.{(bits >> 16) & 255}.{(bits >> 8) & 255}.{bits & 255}"
+    
+    @staticmethod
+    def _uuid_pool(n: int) -> memoryview:
+        """Random bytes for n UUIDs, drawn with a single os.urandom call"""
+        return memoryview(os.urandom(16 * n))
+    
+    @staticmethod
+    def _pool_uuid(pool: memoryview, i: int) -> uuid.UUID:
+        """Version-4 UUID from the i-th 16-byte slot of a pool"""
+        return uuid.UUID(bytes=bytes(pool[16 * i:16 * (i + 1)]), version=4)
     
     def generate_content(self) -> Content:
         """Generate a single piece of content"""
+        return self._generate_content()
+    
+    def _generate_content(self, ids: Optional[memoryview] = None) -> Content:
+        """
+        Generate a single piece of content. ids, if given, is a 2-slot UUID
+        pool supplying the content id and the image id.
+        """
+        choice = self._rng.choice
+        
         # Select scenario
-        scenario = random.choices(SCENARIOS, weights=self.scenario_weights)[0]
+        scenario = self._scenarios_tuple[self._alias_draw(self._scenario_prob, self._scenario_alias)]
         
         # Select user based on scenario
         if scenario.violation_probability > 0.5:
             # Violations more likely from risky users
-            risky_users = [u for u in self.user_pool if u["risk_type"] in ["suspicious", "high_risk", "new"]]
-            user = random.choice(risky_users if risky_users else self.user_pool)
+            user = choice(self._risky_users)
         else:
-            user = random.choice(self.user_pool)
+            user = choice(self._user_pool_t)
         
         # Determine if this content has a violation
-        has_violation = random.random() < scenario.violation_probability
+        has_violation = self._rng.random() < scenario.violation_probability
         
         # Generate text content
-        template = random.choice(scenario.text_templates)
+        template = choice(scenario.text_templates)
         text_content = self._fill_template(template)
         
-        # Determine violations and severity
-        violations = scenario.violation_types if has_violation else []
+        # Determine severity
         severity = self._select_severity(scenario.severity_distribution) if has_violation else SeverityLevel.NONE
         
         # Generate image URL if applicable
         image_url = None
         media_urls = []
         if scenario.content_type == ContentType.IMAGE and scenario.image_categories:
-            category = random.choice(scenario.image_categories)
-            image_url = f"https://cdn.example.com/images/{uuid.uuid4().hex}.jpg?category={category}"
+            category = choice(scenario.image_categories)
+            image_hex = ids[16:32].hex() if ids is not None else uuid.uuid4().hex
+            image_url = _IMG_PREFIX + image_hex + self._cat_suffix[category]
             media_urls = [image_url]
         
         # Create metadata object
-        source_ip = f"{random.randint(1,255)}.{random.randint(0,255)}.{random.randint(0,255)}.{random.randint(0,255)}"
         content_metadata = ContentMetadata(
-            ip_address=source_ip,
-            user_agent=f"GameClient/1.{random.randint(0,9)}.{random.randint(0,99)}",
-            geo_location=random.choice(["us-east-1", "us-west-2", "eu-west-1", "ap-northeast-1"]),
+            ip_address=self._ip_pool[self._rng.getrandbits(self.IP_POOL_BITS)],
+            user_agent=choice(self._ua_pool),
+            geo_location=choice(self.GEO_LOCATIONS),
         )
         
         # Create content object matching the Pydantic model
         content = Content(
+            id=self._pool_uuid(ids, 0) if ids is not None else uuid.uuid4(),
             content_type=scenario.content_type,
-            user_id=uuid.UUID(user["user_id"].replace("user_", "").ljust(32, '0')[:32]) if user["user_id"].startswith("user_") else uuid.uuid4(),
+            user_id=user["user_uuid"],
             text_content=text_content,
             image_url=image_url,
             media_urls=media_urls,
@@ -330,19 +625,122 @@ class ContentGenerator:
         )
         
         # Store simulation metadata as an attribute for testing (won't serialize)
-        content._sim_metadata = {
-            "scenario": scenario.name,
-            "user_risk_type": user["risk_type"],
-            "user_reputation": user["reputation_score"],
-            "expected_violations": [v.value for v in violations],
-            "expected_severity": severity.value,
-        }
+        content._sim_metadata = _SimMeta(
+            scenario.name,
+            user["risk_type"],
+            user["reputation_score"],
+            self._viol_tuples_by_scenario[scenario.name] if has_violation else (),
+            severity.value,
+        )
         
         return content
     
     def generate_batch(self, size: int) -> List[Content]:
         """Generate a batch of content"""
-        return [self.generate_content() for _ in range(size)]
+        pool = self._uuid_pool(2 * size)
+        return [self._generate_content(pool[32 * i:32 * (i + 1)]) for i in range(size)]
+    
+    def generate_batch_fast(self, size: int) -> List[Content]:
+        """
+        Generate a batch of content with all random decisions drawn up front
+        in bulk from NumPy. Same distributions as generate_content; the loop
+        only fills templates and builds the Content objects.
+        """
+        return self._generate_batch_fast(size)[0]
+    
+    def generate_batch_fast_with_stats(self, size: int) -> Tuple[List[Content], Dict[str, np.ndarray]]:
+        """
+        generate_batch_fast plus integer-coded per-item columns for
+        histogramming with np.bincount:
+        - scenario: index into SCENARIOS
+        - severity: expected SeverityLevel value (0 if no violation)
+        - violation_mask: expected violations as bits over VIOLATION_TYPES
+        """
+        contents, core = self._generate_batch_fast(size)
+        tables = self._core_tables
+        scenario = core["scenario"]
+        has_violation = core["has_violation"]
+        stats = {
+            "scenario": scenario,
+            "severity": np.where(has_violation, tables["severity_values"][scenario, core["severity"]], 0),
+            "violation_mask": np.where(has_violation, tables["violation_mask"][scenario], 0),
+        }
+        return contents, stats
+    
+    def _generate_batch_fast(self, size: int) -> Tuple[List[Content], Dict[str, np.ndarray]]:
+        """Build a fast batch; also returns the _generate_core draws behind it"""
+        scenarios = self._scenarios_tuple
+        users = self._users_soa
+        
+        # Step 1: Bulk draws
+        core = _generate_core(self._np_rng, size, self._core_tables)
+        scenario_idx = core["scenario"].tolist()
+        has_violations = core["has_violation"].tolist()
+        template_idx = core["template"].tolist()
+        category_idx = core["category"].tolist()
+        severity_idx = core["severity"].tolist()
+        user_rows = core["user_row"]
+        user_ids = users["content_user_id"][user_rows].tolist()
+        user_risk_types = [self.RISK_TYPES[code] for code in users["risk_type"][user_rows].tolist()]
+        user_reputations = users["reputation_score"][user_rows].tolist()
+        ips = ['.'.join(map(str, octets)) for octets in core["ip_octets"].tolist()]
+        agent_minor = core["agent_minor"].tolist()
+        agent_patch = core["agent_patch"].tolist()
+        regions = self.GEO_LOCATIONS
+        region_idx = core["region"].tolist()
+        image_ids = self._np_rng.bytes(16 * size)
+        created_at = datetime.utcnow()
+        
+        # Step 2: Build objects. Validated construction is kept on purpose:
+        # pydantic-core's compiled validator beats the pure-Python
+        # model_construct path for these models.
+        make_content = Content
+        make_metadata = ContentMetadata
+        make_sim_meta = _SimMeta
+        viol_tuples = self._viol_tuples_by_scenario
+        img_prefix = _IMG_PREFIX
+        cat_suffix = self._cat_suffix
+        contents: List[Content] = []
+        for i in range(size):
+            scenario = scenarios[scenario_idx[i]]
+            has_violation = has_violations[i]
+            text_content = self._fill_template(scenario.text_templates[template_idx[i]])
+            
+            severity = SeverityLevel.NONE
+            if has_violation:
+                levels = self._severity_tables[id(scenario.severity_distribution)][0]
+                severity = levels[severity_idx[i]]
+            
+            image_url = None
+            media_urls = []
+            if scenario.content_type == ContentType.IMAGE and scenario.image_categories:
+                category = scenario.image_categories[category_idx[i]]
+                image_url = img_prefix + image_ids[16 * i:16 * (i + 1)].hex() + cat_suffix[category]
+                media_urls = [image_url]
+            
+            content = make_content(
+                content_type=scenario.content_type,
+                user_id=user_ids[i],
+                text_content=text_content,
+                image_url=image_url,
+                media_urls=media_urls,
+                metadata=make_metadata(
+                    ip_address=ips[i],
+                    user_agent=f"GameClient/1.{agent_minor[i]}.{agent_patch[i]}",
+                    geo_location=regions[region_idx[i]],
+                ),
+                created_at=created_at,
+            )
+            content._sim_metadata = make_sim_meta(
+                scenario.name,
+                user_risk_types[i],
+                user_reputations[i],
+                viol_tuples[scenario.name] if has_violation else (),
+                severity.value,
+            )
+            contents.append(content)
+        
+        return contents, core
     
     def generate_stream(self, rate_per_second: float = 10.0) -> Generator[Content, None, None]:
         """Generate a continuous stream of content at specified rate"""
@@ -353,37 +751,47 @@ class ContentGenerator:
     
     def generate_burst(self, size: int, burst_type: str = "spam") -> List[Content]:
         """Generate a burst of specific content type (simulates attack)"""
-        if burst_type == "spam":
-            scenario = next(s for s in SCENARIOS if s.name == "spam_post")
-        elif burst_type == "toxic":
-            scenario = next(s for s in SCENARIOS if s.name == "toxic_post")
+        if burst_type in ("spam", "toxic"):
+            scenario = self._scenarios_by_name[f"{burst_type}_post"]
         else:
             scenario = SCENARIOS[0]
         
         contents = []
+        pool = self._uuid_pool(2 * size)
+        make_content = Content
+        make_metadata = ContentMetadata
+        pool_uuid = self._pool_uuid
+        choice = self._rng.choice
+        fill_template = self._fill_template
+        getrandbits = self._rng.getrandbits
+        ip_pool = self._ip_pool
+        ip_bits = self.IP_POOL_BITS
+        templates = scenario.text_templates
+        content_type = scenario.content_type
+        burst_scenario = f"burst_{burst_type}"
         # Use a single attacker user
         attacker = {
             "user_id": f"attacker_{uuid.uuid4().hex[:8]}",
-            "username": f"bot_{random.randint(10000, 99999)}",
+            "username": f"bot_{self._rng.randint(10000, 99999)}",
             "risk_type": "high_risk",
             "reputation_score": 0.1,
             "account_age_days": 0,
             "violation_count": 0,
         }
         
-        for _ in range(size):
-            template = random.choice(scenario.text_templates)
-            text_content = self._fill_template(template)
+        for i in range(size):
+            text_content = fill_template(choice(templates))
             
             # Create metadata for burst attack
-            burst_metadata = ContentMetadata(
-                ip_address=f"{random.randint(1,255)}.{random.randint(0,255)}.{random.randint(0,255)}.{random.randint(0,255)}",
+            burst_metadata = make_metadata(
+                ip_address=ip_pool[getrandbits(ip_bits)],
                 geo_location="us-east-1",
             )
             
-            content = Content(
-                content_type=scenario.content_type,
-                user_id=uuid.uuid4(),  # Generate proper UUID for attacker
+            content = make_content(
+                id=pool_uuid(pool, 2 * i),
+                content_type=content_type,
+                user_id=pool_uuid(pool, 2 * i + 1),  # Generate proper UUID for attacker
                 text_content=text_content,
                 media_urls=[],
                 metadata=burst_metadata,
@@ -391,11 +799,7 @@ class ContentGenerator:
             )
             
             # Store simulation metadata
-            content._sim_metadata = {
-                "scenario": f"burst_{burst_type}",
-                "user_risk_type": "attacker",
-                "burst_attack": True,
-            }
+            content._sim_metadata = _SimMeta(burst_scenario, "attacker", burst_attack=True)
             contents.append(content)
         
         return contents
@@ -413,10 +817,10 @@ def main():
     print("\n--- Sample Content (10 items) ---\n")
     for i, content in enumerate(generator.generate_batch(10), 1):
         text_preview = (content.text_content or "")[:80]
-        sim_meta = getattr(content, '_sim_metadata', {})
+        sim_meta = content._sim_metadata
         print(f"{i}. [{content.content_type.value}] {text_preview}...")
-        print(f"   User: {content.user_id} | Scenario: {sim_meta.get('scenario')}")
-        print(f"   Expected: {sim_meta.get('expected_violations')} | Severity: {sim_meta.get('expected_severity')}")
+        print(f"   User: {content.user_id} | Scenario: {sim_meta.scenario}")
+        print(f"   Expected: {list(sim_meta.expected_violations)} | Severity: {sim_meta.expected_severity}")
         print()
     
     # Generate burst
@@ -427,22 +831,28 @@ def main():
     
     # Statistics
     print("\n--- Generation Statistics ---")
-    batch = generator.generate_batch(1000)
+    batch, stats = generator.generate_batch_fast_with_stats(1000)
     
+    # Histogram the integer-coded columns, then fold into dicts for printing
+    scenario_counts = np.bincount(stats["scenario"], minlength=len(SCENARIOS))
     type_counts = {}
+    for scenario, count in zip(SCENARIOS, scenario_counts.tolist()):
+        if count:
+            ct = scenario.content_type.value
+            type_counts[ct] = type_counts.get(ct, 0) + count
+    
+    masks = stats["violation_mask"]
     violation_counts = {}
-    severity_counts = {}
+    for bit, violation in enumerate(ContentGenerator.VIOLATION_TYPES):
+        count = int(np.count_nonzero(masks & (1 << bit)))
+        if count:
+            violation_counts[violation.value] = count
     
-    for content in batch:
-        ct = content.content_type.value
-        type_counts[ct] = type_counts.get(ct, 0) + 1
-        
-        sim_meta = getattr(content, '_sim_metadata', {})
-        for v in sim_meta.get("expected_violations", []):
-            violation_counts[v] = violation_counts.get(v, 0) + 1
-        
-        sev = sim_meta.get("expected_severity", "none")
-        severity_counts[sev] = severity_counts.get(sev, 0) + 1
+    severity_counts = {
+        level: count
+        for level, count in enumerate(np.bincount(stats["severity"], minlength=len(SeverityLevel)).tolist())
+        if count
+    }
     
     print(f"\nContent Types: {json.dumps(type_counts, indent=2)}")
     print(f"\nViolations: {json.dumps(violation_counts, indent=2)}")
@@ -10,11 +10,11 @@ with the Pydantic models.
 
 from __future__ import annotations
 
+import json
 import os
 import random
 import time
 from datetime import datetime
-from uuid import uuid4
 import sys
 
 # Ensure scripts directory is in path for imports
@@ -49,21 +49,87 @@ def _get_broker():
     return _broker
 
 
+# (epoch second, ISO string) of the last formatted timestamp
+_iso_cache = [0, ""]
+
+
+def _now_iso() -> str:
+    """UTC ISO timestamp at second resolution, formatted once per second."""
+    t = int(time.time())
+    cache = _iso_cache
+    if cache[0] != t:
+        cache[0] = t
+        cache[1] = datetime.utcfromtimestamp(t).isoformat()
+    return cache[1]
+
+
+# Random bytes for IDs: one os.urandom call per 256 IDs instead of one per uuid4()
+_RAND_BUF_SIZE = 4096
+_rand_buf = b""
+_rand_pos = 0
+
+
+def _next_hex32() -> str:
+    """32 random hex digits from the shared urandom buffer."""
+    global _rand_buf, _rand_pos
+    if _rand_pos >= len(_rand_buf):
+        _rand_buf = os.urandom(_RAND_BUF_SIZE)
+        _rand_pos = 0
+    pos = _rand_pos
+    _rand_pos = pos + 16
+    return _rand_buf[pos:pos + 16].hex()
+
+
+def _next_uuid() -> str:
+    """Random version-4 UUID string, formatted like str(uuid4())."""
+    h = _next_hex32()
+    return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}"
+
+
+# Compact C-accelerated encoder; payloads are serialized once, here, and
+# handed to the broker as bytes
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _dumps(payload: dict) -> bytes:
+    # ensure_ascii output, so the ASCII codec is exact
+    return _encode_json(payload).encode("ascii")
+
+
+_TEXT_SAMPLES = (
+    "gg everyone",
+    "check this out http://spam.example.com",
+    "you are stupid",
+    "nice play!",
+    "BUY NOW!!! http://scam.example.com",
+)
+_choice = random.choice
+
+
 def _random_text() -> str:
-    samples = [
-        "gg everyone",
-        "check this out http://spam.example.com",
-        "you are stupid",
-        "nice play!",
-        "BUY NOW!!! http://scam.example.com",
-    ]
-    return random.choice(samples)
+    return _choice(_TEXT_SAMPLES)
+
+
+# Flow B payloads have a fixed shape and known-safe values (UUIDs, ints,
+# pre-escaped samples, float repr matches json), so they are formatted
+# straight to JSON instead of going through a dict and the encoder
+_TEXT_SAMPLES_JSON = tuple(_encode_json(text) for text in _TEXT_SAMPLES)
+_CHAT_TPL = '{"message_id":"%s","user_id":"%s","channel_id":"channel_%d","content":%s,"timestamp":%r}'
+
+
+def _chat_payload(message_id: str, user_id: str) -> bytes:
+    return (
+        _CHAT_TPL % (message_id, user_id, random.randint(1, 25), _choice(_TEXT_SAMPLES_JSON), time.time())
+    ).encode("ascii")
 
 
 def run():
     duration = int(os.getenv("SIMULATION_DURATION", "300"))
     content_rate = float(os.getenv("CONTENT_RATE_PER_SEC", "5"))
     chat_rate = float(os.getenv("CHAT_RATE_PER_SEC", "20"))
+    # Events are buffered per topic and published in batches
+    batch_size = max(1, int(os.getenv("PRODUCER_BATCH_SIZE", "128")))
+    flush_interval = float(os.getenv("PRODUCER_FLUSH_INTERVAL_SEC", "0.5"))
 
     # Initialize broker - will fail early with clear message if Kafka unavailable
     try:
@@ -73,44 +139,76 @@ def run():
         print("[producer] Please start Kafka before running the producer.")
         return
 
-    start = time.time()
+    content_period = 1.0 / max(0.1, content_rate)
+    chat_period = 1.0 / max(0.1, chat_rate)
+    # Above ~1000 events/s sleep granularity is too coarse; spin instead
+    spin = min(content_period, chat_period) < 0.001
+
+    start = time.monotonic()
+    end = start + duration
     next_content = start
     next_chat = start
+    next_flush = start + flush_interval
+    content_buf = []
+    chat_buf = []
 
     print(f"[producer] starting for {duration}s (content={content_rate}/s, chat={chat_rate}/s)")
 
-    while time.time() - start < duration:
-        now = time.time()
+    while True:
+        now = time.monotonic()
+        if now >= end:
+            break
 
         # Flow A
         if now >= next_content:
-            next_content = now + (1.0 / max(0.1, content_rate))
-            user_id = str(uuid4())
+            # Fixed schedule; after a stall, resume from now instead of bursting
+            next_content = max(next_content + content_period, now)
+            user_id = _next_uuid()
             content_type = random.choice(["forum_post", "image", "profile"])
+            created_at = _now_iso()
             payload = {
-                "content_id": str(uuid4()),
+                "content_id": _next_uuid(),
                 "content_type": content_type,
                 "user_id": user_id,
                 "text_content": _random_text() if content_type != "image" else None,
-                "image_url": f"https://cdn.example.com/{uuid4().hex}.jpg" if content_type == "image" else None,
-                "metadata": {"source": "simulation", "created_at": datetime.utcnow().isoformat()},
-                "created_at": datetime.utcnow().isoformat(),
+                "image_url": f"https://cdn.example.com/{_next_hex32()}.jpg" if content_type == "image" else None,
+                "metadata": {"source": "simulation", "created_at": created_at},
+                "created_at": created_at,
             }
-            broker.publish_content(payload)
+            content_buf.append((payload["content_id"], _dumps(payload)))
+            if len(content_buf) >= batch_size:
+                broker.publish_content_bytes_many(content_buf)
+                content_buf = []
 
         # Flow B
         if now >= next_chat:
-            next_chat = now + (1.0 / max(0.1, chat_rate))
-            payload = {
-                "message_id": str(uuid4()),
-                "user_id": str(uuid4()),
-                "channel_id": f"channel_{random.randint(1, 25)}",
-                "content": _random_text(),
-                "timestamp": time.time(),
-            }
-            broker.publish_chat(payload)
-
-        time.sleep(0.001)
+            next_chat = max(next_chat + chat_period, now)
+            user_id = _next_uuid()
+            chat_buf.append((user_id, _chat_payload(_next_uuid(), user_id)))
+            if len(chat_buf) >= batch_size:
+                broker.publish_chat_bytes_many(chat_buf)
+                chat_buf = []
+
+        # Time boundary: don't hold partial batches for long at low rates
+        if now >= next_flush:
+            next_flush = now + flush_interval
+            if content_buf:
+                broker.publish_content_bytes_many(content_buf)
+                content_buf = []
+            if chat_buf:
+                broker.publish_chat_bytes_many(chat_buf)
+                chat_buf = []
+
+        # Sleep until the next event is due instead of polling
+        if not spin:
+            sleep_for = min(next_content, next_chat, next_flush, end) - time.monotonic()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+
+    if content_buf:
+        broker.publish_content_bytes_many(content_buf)
+    if chat_buf:
+        broker.publish_chat_bytes_many(chat_buf)
 
     print("[producer] finished")
 
@@ -4,12 +4,16 @@ Combines content generation, stream processing, and metrics collection
 """
 
 import asyncio
+import itertools
 import random
 import time
 import json
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Deque
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+import numpy as np
 import os
 import sys
 
@@ -21,6 +25,7 @@ if _scripts_dir not in sys.path:
 from simulation.content_generator import ContentGenerator
 from simulation.realtime_chat_simulator import RealtimeChatSimulator, SimulationConfig
 from models.content import Content, ModerationResult
+from models.enums import ContentStatus, DecisionType, ProcessingTier
 from models.realtime import ChatMessage, FlinkDecision
 from services.moderation_service import ModerationService
 from services.realtime_service import RealTimeService
@@ -34,6 +39,11 @@ class PipelineConfig:
     content_batch_size: int = 100
     enable_flow_a: bool = True
     
+    # Generation -> moderation queues (Flow A and B); consumers per flow
+    flow_workers: int = 4
+    # Cap on concurrent moderate_content calls, independent of flow_workers
+    max_inflight_moderation: int = 32
+    
     # Chat pipeline (Flow B)
     chat_channels: int = 10
     chat_users_per_channel: int = 50
@@ -50,141 +60,272 @@ class PipelineConfig:
     verbose: bool = True
     save_results: bool = True
     output_file: str = "simulation_results.json"
+    max_snapshots: int = 3600  # Metrics time series ring buffer size
 
 
-class MetricsCollector:
-    """Collects and aggregates pipeline metrics"""
+# Enum members compared by identity on the record path; anything else
+# counts as escalated / tier3 / flagged
+_APPROVED = ContentStatus.APPROVED
+_REJECTED = ContentStatus.REJECTED
+_TIER1_FAST = ProcessingTier.TIER1_FAST
+_TIER2_ML = ProcessingTier.TIER2_ML
+_ALLOW = DecisionType.ALLOW
+_BLOCK = DecisionType.BLOCK
+
+
+# FlowCounters.counts layout. Latencies are integer milliseconds, so sums
+# are exact regardless of how many events are recorded.
+I_TOTAL_CONTENT = 0
+I_APPROVED, I_REJECTED, I_ESCALATED = 1, 2, 3
+I_TIER1, I_TIER2, I_TIER3 = 4, 5, 6
+I_FLOW_A_LATENCY_MS = 7
+I_TOTAL_MESSAGES = 8
+I_ALLOWED, I_BLOCKED, I_FLAGGED = 9, 10, 11
+I_FLOW_B_LATENCY_MS = 12
+I_ATTACK_MESSAGES = 13
+N_COUNTERS = 14
+
+
+class FlowCounters:
+    """
+    Metric counters owned by one writer (e.g. a consumer task).
+    MetricsCollector merges all registered shards at snapshot time.
+    """
+    
+    __slots__ = ("counts", "violation_counts")
     
     def __init__(self):
-        self.start_time = datetime.utcnow()
-        self.flow_a_metrics = {
-            "total_content": 0,
-            "approved": 0,
-            "rejected": 0,
-            "escalated": 0,
-            "tier1_decisions": 0,
-            "tier2_decisions": 0,
-            "tier3_decisions": 0,
-            "total_latency_ms": 0.0,
-            "violations_by_type": {},
-        }
-        self.flow_b_metrics = {
-            "total_messages": 0,
-            "allowed": 0,
-            "blocked": 0,
-            "flagged": 0,
-            "total_latency_ms": 0.0,
-            "attack_messages": 0,
-        }
-        self.time_series: List[Dict[str, Any]] = []
+        # Plain list: per-element increments are several times cheaper than
+        # on a NumPy array; arrays are only built when shards are summed
+        self.counts = [0] * N_COUNTERS
+        self.violation_counts: Counter = Counter()  # ViolationType -> count
     
     def record_flow_a(self, content: Content, result: ModerationResult):
         """Record Flow A (async content) metrics"""
-        self.flow_a_metrics["total_content"] += 1
-        
-        # Use correct field names from ModerationResult model
-        decision_value = result.decision.value if result.decision else "unknown"
-        if decision_value == "approved":
-            self.flow_a_metrics["approved"] += 1
-        elif decision_value == "rejected":
-            self.flow_a_metrics["rejected"] += 1
+        counts = self.counts
+        counts[I_TOTAL_CONTENT] += 1
+        
+        decision = result.decision
+        if decision is _APPROVED:
+            counts[I_APPROVED] += 1
+        elif decision is _REJECTED:
+            counts[I_REJECTED] += 1
         else:
-            self.flow_a_metrics["escalated"] += 1
-        
-        # Track tier decisions using tier_processed field
-        tier_value = result.tier_processed.value if result.tier_processed else "tier1_fast"
-        if "tier1" in tier_value:
-            self.flow_a_metrics["tier1_decisions"] += 1
-        elif "tier2" in tier_value:
-            self.flow_a_metrics["tier2_decisions"] += 1
+            counts[I_ESCALATED] += 1
+        
+        tier = result.tier_processed
+        if tier is _TIER1_FAST:
+            counts[I_TIER1] += 1
+        elif tier is _TIER2_ML:
+            counts[I_TIER2] += 1
         else:
-            self.flow_a_metrics["tier3_decisions"] += 1
+            counts[I_TIER3] += 1
         
-        # Track latency
-        self.flow_a_metrics["total_latency_ms"] += result.processing_time_ms
+        counts[I_FLOW_A_LATENCY_MS] += result.processing_time_ms
         
-        # Track violations using 'violations' field (not violations_detected)
-        for v in result.violations:
-            vtype = v.value
-            self.flow_a_metrics["violations_by_type"][vtype] = (
-                self.flow_a_metrics["violations_by_type"].get(vtype, 0) + 1
-            )
+        if result.violations:
+            self.violation_counts.update(result.violations)
     
     def record_flow_b(self, message: ChatMessage, decision: FlinkDecision):
         """Record Flow B (real-time chat) metrics"""
-        self.flow_b_metrics["total_messages"] += 1
-        
-        if decision.decision_type.value == "allow":
-            self.flow_b_metrics["allowed"] += 1
-        elif decision.decision_type.value == "block":
-            self.flow_b_metrics["blocked"] += 1
+        counts = self.counts
+        counts[I_TOTAL_MESSAGES] += 1
+        
+        decision_type = decision.decision_type
+        if decision_type is _ALLOW:
+            counts[I_ALLOWED] += 1
+        elif decision_type is _BLOCK:
+            counts[I_BLOCKED] += 1
         else:
-            self.flow_b_metrics["flagged"] += 1
+            counts[I_FLAGGED] += 1
         
-        self.flow_b_metrics["total_latency_ms"] += decision.processing_time_ms
+        counts[I_FLOW_B_LATENCY_MS] += decision.processing_time_ms
         
         if message.metadata.get("attack_pattern"):
-            self.flow_b_metrics["attack_messages"] += 1
+            counts[I_ATTACK_MESSAGES] += 1
+
+
+class MetricsCollector:
+    """Collects and aggregates pipeline metrics"""
+    
+    __slots__ = ("start_time", "time_series", "_shards", "_start_perf")
+    
+    def __init__(self, max_snapshots: int = 3600):
+        self.start_time = datetime.utcnow()  # Wall clock, for display only
+        self._start_perf = time.perf_counter()
+        # Compact cumulative counters per snapshot; oldest dropped past max_snapshots
+        self.time_series: Deque[Dict[str, Any]] = deque(maxlen=max_snapshots)
+        # Shard 0 backs record_flow_a/record_flow_b; workers register their own
+        self._shards: List[FlowCounters] = [FlowCounters()]
+    
+    def new_shard(self) -> FlowCounters:
+        """Register and return counters for a single writer"""
+        shard = FlowCounters()
+        self._shards.append(shard)
+        return shard
+    
+    def record_flow_a(self, content: Content, result: ModerationResult):
+        """Record Flow A (async content) metrics"""
+        self._shards[0].record_flow_a(content, result)
+    
+    def record_flow_b(self, message: ChatMessage, decision: FlinkDecision):
+        """Record Flow B (real-time chat) metrics"""
+        self._shards[0].record_flow_b(message, decision)
+    
+    @property
+    def total_content(self) -> int:
+        return sum([shard.counts[I_TOTAL_CONTENT] for shard in self._shards])
+    
+    @property
+    def total_messages(self) -> int:
+        return sum([shard.counts[I_TOTAL_MESSAGES] for shard in self._shards])
+    
+    def _totals(self) -> List[int]:
+        """Counter columns summed across shards in one vectorized pass"""
+        rows = np.array([shard.counts for shard in self._shards], dtype=np.int64)
+        return rows.sum(axis=0).tolist()
+    
+    @property
+    def flow_a_metrics(self) -> Dict[str, Any]:
+        """Flow A counters merged across shards, in their reporting shape"""
+        return self._flow_a_metrics(self._totals())
+    
+    @property
+    def flow_b_metrics(self) -> Dict[str, Any]:
+        """Flow B counters merged across shards, in their reporting shape"""
+        return self._flow_b_metrics(self._totals())
+    
+    def _flow_a_metrics(self, totals: List[int]) -> Dict[str, Any]:
+        violations: Counter = Counter()
+        for shard in self._shards:
+            violations.update(shard.violation_counts)
+        
+        return {
+            "total_content": totals[I_TOTAL_CONTENT],
+            "approved": totals[I_APPROVED],
+            "rejected": totals[I_REJECTED],
+            "escalated": totals[I_ESCALATED],
+            "tier1_decisions": totals[I_TIER1],
+            "tier2_decisions": totals[I_TIER2],
+            "tier3_decisions": totals[I_TIER3],
+            "total_latency_ms": float(totals[I_FLOW_A_LATENCY_MS]),
+            "violations_by_type": {v.value: n for v, n in violations.items()},
+        }
+    
+    def _flow_b_metrics(self, totals: List[int]) -> Dict[str, Any]:
+        return {
+            "total_messages": totals[I_TOTAL_MESSAGES],
+            "allowed": totals[I_ALLOWED],
+            "blocked": totals[I_BLOCKED],
+            "flagged": totals[I_FLAGGED],
+            "total_latency_ms": float(totals[I_FLOW_B_LATENCY_MS]),
+            "attack_messages": totals[I_ATTACK_MESSAGES],
+        }
     
     def snapshot(self) -> Dict[str, Any]:
         """Take a snapshot of current metrics"""
-        elapsed = (datetime.utcnow() - self.start_time).total_seconds()
+        # Monotonic, so rates can't go negative or jump with clock adjustments
+        elapsed = time.perf_counter() - self._start_perf
+        totals = self._totals()
+        flow_a = self._flow_a_metrics(totals)
+        flow_b = self._flow_b_metrics(totals)
+        
+        # Shared denominators as reciprocals; derived fields are added to the
+        # freshly built flow dicts in place rather than splatted into copies
+        inv_elapsed = 1.0 / max(1, elapsed)
+        inv_a = 1.0 / max(1, totals[I_TOTAL_CONTENT])
+        inv_b = 1.0 / max(1, totals[I_TOTAL_MESSAGES])
+        
+        flow_a["avg_latency_ms"] = totals[I_FLOW_A_LATENCY_MS] * inv_a
+        flow_a["throughput_per_second"] = totals[I_TOTAL_CONTENT] * inv_elapsed
+        flow_a["approval_rate"] = totals[I_APPROVED] * inv_a
+        
+        flow_b["avg_latency_ms"] = totals[I_FLOW_B_LATENCY_MS] * inv_b
+        flow_b["throughput_per_second"] = totals[I_TOTAL_MESSAGES] * inv_elapsed
+        flow_b["block_rate"] = totals[I_BLOCKED] * inv_b
         
         snapshot = {
             "timestamp": datetime.utcnow().isoformat(),
             "elapsed_seconds": elapsed,
-            "flow_a": {
-                **self.flow_a_metrics,
-                "avg_latency_ms": (
-                    self.flow_a_metrics["total_latency_ms"] / 
-                    max(1, self.flow_a_metrics["total_content"])
-                ),
-                "throughput_per_second": self.flow_a_metrics["total_content"] / max(1, elapsed),
-                "approval_rate": (
-                    self.flow_a_metrics["approved"] / 
-                    max(1, self.flow_a_metrics["total_content"])
-                ),
-            },
-            "flow_b": {
-                **self.flow_b_metrics,
-                "avg_latency_ms": (
-                    self.flow_b_metrics["total_latency_ms"] / 
-                    max(1, self.flow_b_metrics["total_messages"])
-                ),
-                "throughput_per_second": self.flow_b_metrics["total_messages"] / max(1, elapsed),
-                "block_rate": (
-                    self.flow_b_metrics["blocked"] / 
-                    max(1, self.flow_b_metrics["total_messages"])
-                ),
-            },
+            "flow_a": flow_a,
+            "flow_b": flow_b,
         }
         
-        self.time_series.append(snapshot)
+        self.time_series.append({
+            "elapsed_seconds": elapsed,
+            "flow_a_total": totals[I_TOTAL_CONTENT],
+            "flow_a_approved": totals[I_APPROVED],
+            "flow_a_latency_ms": totals[I_FLOW_A_LATENCY_MS],
+            "flow_b_total": totals[I_TOTAL_MESSAGES],
+            "flow_b_blocked": totals[I_BLOCKED],
+            "flow_b_latency_ms": totals[I_FLOW_B_LATENCY_MS],
+        })
         return snapshot
     
+    def _interval_series(self) -> List[Dict[str, Any]]:
+        """Per-interval rates rebuilt from consecutive cumulative snapshots"""
+        series = []
+        prev = None
+        # Once the ring buffer has wrapped, its oldest point only serves as a baseline
+        wrapped = len(self.time_series) == self.time_series.maxlen
+        for point in self.time_series:
+            if prev is None:
+                if wrapped:
+                    prev = point
+                    continue
+                prev = dict.fromkeys(point, 0)
+            dt = max(1e-9, point["elapsed_seconds"] - prev["elapsed_seconds"])
+            flow_a = point["flow_a_total"] - prev["flow_a_total"]
+            flow_b = point["flow_b_total"] - prev["flow_b_total"]
+            series.append({
+                **point,
+                "flow_a_throughput_per_second": flow_a / dt,
+                "flow_a_avg_latency_ms": (point["flow_a_latency_ms"] - prev["flow_a_latency_ms"]) / max(1, flow_a),
+                "flow_b_throughput_per_second": flow_b / dt,
+                "flow_b_avg_latency_ms": (point["flow_b_latency_ms"] - prev["flow_b_latency_ms"]) / max(1, flow_b),
+            })
+            prev = point
+        return series
+    
     def get_summary(self) -> Dict[str, Any]:
         """Get final summary of all metrics"""
         final_snapshot = self.snapshot()
+        flow_a_total = final_snapshot["flow_a"]["total_content"]
+        flow_b_total = final_snapshot["flow_b"]["total_messages"]
         
         return {
             "summary": {
                 "duration_seconds": final_snapshot["elapsed_seconds"],
-                "flow_a_total": self.flow_a_metrics["total_content"],
-                "flow_b_total": self.flow_b_metrics["total_messages"],
+                "flow_a_total": flow_a_total,
+                "flow_b_total": flow_b_total,
                 "combined_throughput": (
-                    self.flow_a_metrics["total_content"] + 
-                    self.flow_b_metrics["total_messages"]
-                ) / max(1, final_snapshot["elapsed_seconds"]),
+                    (flow_a_total + flow_b_total) / max(1, final_snapshot["elapsed_seconds"])
+                ),
             },
             "flow_a": final_snapshot["flow_a"],
             "flow_b": final_snapshot["flow_b"],
-            "time_series": self.time_series,
+            "time_series": self._interval_series(),
         }
 
 
+ATTACK_TYPES = ("spam", "toxic", "raid")
+
+
+def _write_results(path: str, results: Dict[str, Any]) -> None:
+    """Write simulation results as JSON (blocking; run via asyncio.to_thread)"""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+
+
 class PipelineRunner:
     """Runs the complete simulation pipeline"""
     
+    # Flow B inter-message gaps drawn per NumPy call
+    FLOW_B_GAP_BATCH = 4096
+    
+    # How often verbose runs report per-flow progress
+    PROGRESS_INTERVAL_SECONDS = 0.5
+    
     def __init__(self, config: Optional[PipelineConfig] = None):
         self.config = config or PipelineConfig()
         
@@ -201,61 +342,160 @@ class PipelineRunner:
         self.moderation_service = ModerationService()
         self.realtime_service = RealTimeService()
         
-        self.metrics = MetricsCollector()
+        self.metrics = MetricsCollector(max_snapshots=self.config.max_snapshots)
         self.running = False
+        
+        # Bounded so a slow consumer applies backpressure to generation
+        queue_size = max(1, self.config.content_batch_size) * 2
+        self.flow_a_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.flow_b_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Bounds in-flight moderation calls even if flow_workers is raised
+        self._moderation_slots = asyncio.Semaphore(max(1, self.config.max_inflight_moderation))
+        
+        # Flow A batches are generated off the event loop. One worker keeps
+        # ContentGenerator calls serialized (it is not thread-safe). Created
+        # per run() and always shut down when it ends.
+        self._generation_executor: Optional[ThreadPoolExecutor] = None
     
     async def run_flow_a(self):
-        """Run Flow A (async content moderation)"""
+        """Run Flow A (async content moderation) producer"""
         if not self.config.enable_flow_a:
             return
         
-        interval = 1.0 / self.config.content_rate_per_second
+        rate = self.config.content_rate_per_second
+        # At most one second's worth per batch so low rates don't arrive in bursts
+        batch_size = max(1, min(self.config.content_batch_size, int(rate)))
+        batch_interval = batch_size / rate
+        loop = asyncio.get_running_loop()
+        next_batch_at = loop.time()
+        queue = self.flow_a_queue
         
         while self.running:
             try:
-                # Generate content
-                content = self.content_generator.generate_content()
+                # Generate a batch in the worker thread so moderation keeps
+                # running meanwhile; put() blocks while consumers are behind
+                batch = await loop.run_in_executor(
+                    self._generation_executor, self._generate_content_batch, batch_size
+                )
+                for content in batch:
+                    await queue.put(content)
                 
-                # Process through moderation service
-                result = await self.moderation_service.moderate_content(content)
+                # Absolute deadlines on the loop clock, so processing time
+                # doesn't accumulate as drift. Up to one interval of lateness
+                # is caught up; beyond that, resume from now instead of bursting.
+                next_batch_at += batch_interval
+                now = loop.time()
+                if next_batch_at < now - batch_interval:
+                    next_batch_at = now
+                await asyncio.sleep(max(0.0, next_batch_at - now))
                 
-                # Record metrics
-                self.metrics.record_flow_a(content, result)
-                
-                if self.config.verbose and self.metrics.flow_a_metrics["total_content"] % 100 == 0:
-                    print(f"[Flow A] Processed {self.metrics.flow_a_metrics['total_content']} items")
+            except Exception as e:
+                print(f"[Flow A] Error: {e}")
+                await asyncio.sleep(0.1)
+    
+    def _generate_content_batch(self, size: int) -> List[Content]:
+        """Generate Flow A content (runs in the generation thread)"""
+        generate = self.content_generator.generate_content
+        return [generate() for _ in range(size)]
+    
+    async def _flow_a_consumer(self):
+        """Moderate queued Flow A content and record metrics"""
+        # Bound once per worker instead of looked up per item
+        get = self.flow_a_queue.get
+        task_done = self.flow_a_queue.task_done
+        slots = self._moderation_slots
+        moderate = self.moderation_service.moderate_content
+        record = self.metrics.new_shard().record_flow_a
+        
+        while True:
+            content = await get()
+            try:
+                # Process through moderation service; waiting for a slot
+                # stalls this consumer, which in turn backs up the queue
+                async with slots:
+                    pipeline_result = await moderate(content)
                 
-                await asyncio.sleep(interval)
+                # Record metrics
+                record(content, pipeline_result.result)
                 
             except Exception as e:
                 print(f"[Flow A] Error: {e}")
-                await asyncio.sleep(0.1)
+            finally:
+                task_done()
     
     async def run_flow_b(self):
-        """Run Flow B (real-time chat moderation)"""
+        """Run Flow B (real-time chat moderation) producer"""
         if not self.config.enable_flow_b:
             return
         
+        queue = self.flow_b_queue
+        # Inter-message gaps (10ms +/- 50%) drawn in bulk, refilled when used up
+        rng = np.random.default_rng()
+        gaps: List[float] = []
+        gap_idx = 0
+        
         while self.running:
             try:
                 # Generate chat message
-                message = self.chat_simulator.generate_message()
+                await queue.put(self.chat_simulator.generate_message())
+                
+                # Variable sleep based on simulated traffic
+                if gap_idx >= len(gaps):
+                    gaps = rng.uniform(0.005, 0.015, self.FLOW_B_GAP_BATCH).tolist()
+                    gap_idx = 0
+                await asyncio.sleep(gaps[gap_idx])
+                gap_idx += 1
                 
+            except Exception as e:
+                print(f"[Flow B] Error: {e}")
+                await asyncio.sleep(0.01)
+    
+    async def _flow_b_consumer(self):
+        """Moderate queued Flow B messages and record metrics"""
+        # Bound once per worker instead of looked up per item
+        get = self.flow_b_queue.get
+        task_done = self.flow_b_queue.task_done
+        decide = self.chat_simulator.simulate_moderation_decision
+        record = self.metrics.new_shard().record_flow_b
+        
+        while True:
+            message = await get()
+            try:
                 # Process through realtime service
-                decision = self.chat_simulator.simulate_moderation_decision(message)
+                decision = decide(message)
                 
                 # Record metrics
-                self.metrics.record_flow_b(message, decision)
-                
-                if self.config.verbose and self.metrics.flow_b_metrics["total_messages"] % 500 == 0:
-                    print(f"[Flow B] Processed {self.metrics.flow_b_metrics['total_messages']} messages")
-                
-                # Variable sleep based on simulated traffic
-                await asyncio.sleep(0.01 * random.uniform(0.5, 1.5))
+                record(message, decision)
                 
             except Exception as e:
                 print(f"[Flow B] Error: {e}")
-                await asyncio.sleep(0.01)
+            finally:
+                task_done()
+    
+    async def run_progress_printer(self):
+        """
+        Report progress every PROGRESS_INTERVAL_SECONDS, in one write, when
+        a flow has crossed another multiple of its reporting step. Keeps
+        printing (and the total check) off the per-item path.
+        """
+        reported_a = reported_b = 0
+        
+        while self.running:
+            await asyncio.sleep(self.PROGRESS_INTERVAL_SECONDS)
+            
+            lines = []
+            step_a = self.metrics.total_content // 100 * 100
+            if step_a > reported_a:
+                reported_a = step_a
+                lines.append(f"[Flow A] Processed {step_a} items\n")
+            step_b = self.metrics.total_messages // 500 * 500
+            if step_b > reported_b:
+                reported_b = step_b
+                lines.append(f"[Flow B] Processed {step_b} messages\n")
+            
+            if lines:
+                sys.stdout.writelines(lines)
+                sys.stdout.flush()
     
     async def run_metrics_collector(self):
         """Periodically collect and display metrics"""
@@ -281,12 +521,13 @@ class PipelineRunner:
         if not self.config.enable_attacks:
             return
         
-        attack_types = ["spam", "toxic", "raid"]
+        # Shuffled once up front; each tick just takes the next entry
+        attack_cycle = itertools.cycle(random.sample(ATTACK_TYPES * 300, len(ATTACK_TYPES) * 300))
         
         while self.running:
             await asyncio.sleep(self.config.attack_interval_seconds)
             
-            attack_type = random.choice(attack_types)
+            attack_type = next(attack_cycle)
             channel_id = self.chat_simulator.trigger_attack(attack_type)
             
             if self.config.verbose:
@@ -304,42 +545,51 @@ class PipelineRunner:
         print("=" * 60 + "\n")
         
         self.running = True
+        self._generation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="flow-a-gen")
         
         # Create tasks
         tasks = []
         
-        if self.config.enable_flow_a:
-            tasks.append(asyncio.create_task(self.run_flow_a()))
-        
-        if self.config.enable_flow_b:
-            tasks.append(asyncio.create_task(self.run_flow_b()))
-        
-        tasks.append(asyncio.create_task(self.run_metrics_collector()))
-        
-        if self.config.enable_attacks:
-            tasks.append(asyncio.create_task(self.run_attack_simulator()))
-        
-        # Run for specified duration
-        await asyncio.sleep(self.config.duration_seconds)
-        
-        # Stop all tasks
-        self.running = False
-        
-        # Wait for tasks to complete
-        for task in tasks:
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+        try:
+            workers = max(1, self.config.flow_workers)
+            
+            if self.config.enable_flow_a:
+                tasks.append(asyncio.create_task(self.run_flow_a()))
+                tasks.extend(asyncio.create_task(self._flow_a_consumer()) for _ in range(workers))
+            
+            if self.config.enable_flow_b:
+                tasks.append(asyncio.create_task(self.run_flow_b()))
+                tasks.extend(asyncio.create_task(self._flow_b_consumer()) for _ in range(workers))
+            
+            tasks.append(asyncio.create_task(self.run_metrics_collector()))
+            
+            if self.config.verbose:
+                tasks.append(asyncio.create_task(self.run_progress_printer()))
+            
+            if self.config.enable_attacks:
+                tasks.append(asyncio.create_task(self.run_attack_simulator()))
+            
+            # Run for specified duration
+            await asyncio.sleep(self.config.duration_seconds)
+        finally:
+            # Stop all tasks
+            self.running = False
+            
+            # Cancel everything, then wait for all cancellations together
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # At most one in-flight batch is left to finish
+            self._generation_executor.shutdown(cancel_futures=True)
+            self._generation_executor = None
         
         # Get final results
         results = self.metrics.get_summary()
         
         # Save results if configured
         if self.config.save_results:
-            with open(self.config.output_file, 'w') as f:
-                json.dump(results, f, indent=2, default=str)
+            # Large time series take a while to encode; keep it off the event loop
+            await asyncio.to_thread(_write_results, self.config.output_file, results)
             print(f"\nResults saved to {self.config.output_file}")
         
         # Print summary
@@ -378,5 +628,15 @@ async def main():
     return results
 
 
+def _install_uvloop() -> None:
+    """Use uvloop's event loop if available (pulled in by uvicorn[standard])"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 if __name__ == "__main__":
+    _install_uvloop()
     asyncio.run(main())
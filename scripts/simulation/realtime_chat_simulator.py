@@ -4,17 +4,20 @@ Generates chat streams with burst patterns, spam attacks, and normal traffic
 """
 
 import random
-import uuid
+import itertools
 import time
 import asyncio
+import inspect
 from datetime import datetime, timedelta
-from typing import List, Optional, Generator, Callable, Dict, Any
+from typing import List, Optional, Generator, Callable, Dict, Any, Sequence, Tuple
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import Enum, IntEnum
 import json
 import os
 import sys
 
+import numpy as np
+
 # Ensure scripts directory is in path for imports
 _scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _scripts_dir not in sys.path:
@@ -34,17 +37,25 @@ class ChatPattern(Enum):
     LOW_ACTIVITY = "low_activity"
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatChannel:
     """Represents a chat channel/room"""
     channel_id: str
     channel_type: str  # "game_lobby", "team_chat", "global", "whisper"
-    active_users: List[str]
+    active_users: np.ndarray  # int32 indices into the simulator's user arrays
     message_rate: float  # messages per second
     toxicity_baseline: float  # 0-1 baseline toxicity level
+    # Per-channel message metadata constants, built once
+    _meta_base: Dict[str, Any] = field(init=False, repr=False, compare=False)
+    # len(active_users), kept in step by the simulator when it assigns users
+    _n_users: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._meta_base = {"channel_type": self.channel_type}
+        self._n_users = len(self.active_users)
     
 
-@dataclass
+@dataclass(slots=True)
 class SimulationConfig:
     """Configuration for chat simulation"""
     channels: int = 10
@@ -116,18 +127,132 @@ class ChatMessageGenerator:
         msg = msg.replace("{streamer}", random.choice(cls.STREAMERS))
         msg = msg.replace("{emote}", random.choice(cls.EMOTES))
         return msg
+    
+    # Variants driven by pre-drawn uniforms in [0, 1), for batch generation
+    
+    @classmethod
+    def normal_from(cls, u0: float) -> str:
+        return cls.NORMAL_MESSAGES[int(u0 * len(cls.NORMAL_MESSAGES))]
+    
+    @classmethod
+    def spam_from(cls, u0: float, u1: float) -> str:
+        msg = cls.SPAM_MESSAGES[int(u0 * len(cls.SPAM_MESSAGES))]
+        return msg.replace("{url}", cls.URLS[int(u1 * len(cls.URLS))])
+    
+    @classmethod
+    def toxic_from(cls, u0: float) -> str:
+        return cls.TOXIC_MESSAGES[int(u0 * len(cls.TOXIC_MESSAGES))]
+    
+    @classmethod
+    def raid_from(cls, u0: float, u1: float, u2: float) -> str:
+        msg = cls.RAID_MESSAGES[int(u0 * len(cls.RAID_MESSAGES))]
+        msg = msg.replace("{streamer}", cls.STREAMERS[int(u1 * len(cls.STREAMERS))])
+        return msg.replace("{emote}", cls.EMOTES[int(u2 * len(cls.EMOTES))])
+
+
+# Attack started by a trigger roll, indexed by searchsorted over the
+# cumulative [spam, toxic, raid] probabilities; past the end: no attack
+TRIGGER_PATTERNS = (ChatPattern.SPAM_ATTACK, ChatPattern.TOXIC_OUTBREAK, ChatPattern.RAID, None)
+
+# Uniforms consumed per message by _compose_message:
+# toxicity roll, spammer roll, severity roll, 3 text picks
+ROLLS_PER_MESSAGE = 6
+
+
+class UserBehavior(IntEnum):
+    """User behavior profile; int-valued so per-message checks compare ints"""
+    NORMAL = 0
+    CHATTY = 1
+    QUIET = 2
+    TOXIC = 3
+    SPAMMER = 4
+
+
+# Per-behavior profile tables, indexed by UserBehavior
+_BEHAVIOR_WEIGHTS = (0.80, 0.10, 0.05, 0.03, 0.02)
+_RATE_MULT = (1.0, 3.0, 0.3, 1.5, 10.0)
+_TOX_MULT = (1.0, 1.2, 0.5, 15.0, 0.5)
+_REP_RANGES = ((0.50, 0.90), (0.40, 0.80), (0.60, 0.95), (0.10, 0.40), (0.05, 0.25))
+BEHAVIOR_LABELS = tuple(behavior.name.lower() for behavior in UserBehavior)
+_SPAMMER = int(UserBehavior.SPAMMER)
+
+# Message outcomes as (message type, expected_violations, expected_severity),
+# with enum values resolved once; the violation tuples are shared, not copied
+_OUTCOME_NORMAL = (MessageType.NORMAL, (), SeverityLevel.NONE.value)
+_OUTCOME_SPAM = (MessageType.SPAM, (ViolationType.SPAM.value,), SeverityLevel.MEDIUM.value)
+_OUTCOME_TOXIC_LOW = (MessageType.TOXIC, (ViolationType.HARASSMENT.value,), SeverityLevel.LOW.value)
+_OUTCOME_TOXIC_MEDIUM = (MessageType.TOXIC, (ViolationType.HARASSMENT.value,), SeverityLevel.MEDIUM.value)
+
+_SEVERITY_MEDIUM = int(SeverityLevel.MEDIUM)
+_SEVERITY_HIGH = int(SeverityLevel.HIGH)
+_LATENCY_EMA_ALPHA = 0.1
+
+
+def _decide(
+    severity: int,
+    has_violations: bool,
+    latency_ema: float,
+    rand: Callable[[], float] = random.random
+) -> Tuple[DecisionType, float, float, float, float]:
+    """
+    Numeric core of simulate_moderation_decision, on plain scalars.
+    
+    Returns (decision, simulated latency ms, confidence, risk, updated latency EMA).
+    """
+    latency = 2.0 + 6.0 * rand()  # Simulate realistic latency
+    if has_violations:
+        if severity >= _SEVERITY_HIGH:
+            decision = DecisionType.BLOCK
+        elif severity == _SEVERITY_MEDIUM:
+            decision = DecisionType.BLOCK if rand() < 0.5 else DecisionType.FLAG
+        else:
+            decision = DecisionType.FLAG
+        confidence = 0.7 + 0.29 * rand()
+        risk = 0.6 + 0.35 * rand()
+    else:
+        decision = DecisionType.ALLOW
+        confidence = 0.85 + 0.14 * rand()
+        risk = 0.05 + 0.25 * rand()
+    new_ema = _LATENCY_EMA_ALPHA * latency + (1 - _LATENCY_EMA_ALPHA) * latency_ema
+    return decision, latency, confidence, risk, new_ema
+
+
+# simulate_moderation_decisions decision codes
+_DECISIONS = (DecisionType.ALLOW, DecisionType.FLAG, DecisionType.BLOCK)
+
+
+# Value -> member, avoiding the EnumType call for violations_detected
+_VIOLATION_BY_VALUE = {violation.value: violation for violation in ViolationType}
+_ATTACK_PATTERN_VALUES = {None: None, **{pattern: pattern.value for pattern in ChatPattern}}
+_SPAM_ATTACK = ChatPattern.SPAM_ATTACK
+_TOXIC_OUTBREAK = ChatPattern.TOXIC_OUTBREAK
+_RAID = ChatPattern.RAID
 
 
 class RealtimeChatSimulator:
     """Simulates real-time chat streams for moderation testing"""
     
+    # Upper bound on messages drawn per NumPy batch in generate_stream
+    STREAM_BATCH_SIZE = 1024
+    
     def __init__(self, config: Optional[SimulationConfig] = None, seed: Optional[int] = None):
         self.config = config or SimulationConfig()
         if seed:
             random.seed(seed)
+        self._np_rng = np.random.default_rng(seed)
+        # Message IDs count up from a random 48-bit offset: unique within
+        # the run, and unlikely to collide across runs
+        self._msg_ids = itertools.count(int(self._np_rng.integers(1 << 47)))
+        self._attack_thresholds = np.cumsum([
+            self.config.spam_attack_probability,
+            self.config.toxic_outbreak_probability,
+            self.config.raid_probability,
+        ])
         
         self.channels = self._create_channels()
-        self.users = self._create_users()
+        self._channel_tox = np.array([channel.toxicity_baseline for channel in self.channels])
+        self._create_users()
+        self._users: Optional[Dict[str, dict]] = None
         self.active_attacks: Dict[str, Dict[str, Any]] = {}
         self.metrics = {
             "total_messages": 0,
@@ -144,99 +269,76 @@ class RealtimeChatSimulator:
         
         for i in range(self.config.channels):
             channel = ChatChannel(
-                channel_id=f"channel_{uuid.uuid4().hex[:8]}",
+                channel_id=f"channel_{self._np_rng.integers(1 << 32):08x}",
                 channel_type=random.choice(channel_types),
-                active_users=[],
+                active_users=np.empty(0, dtype=np.int32),
                 message_rate=self.config.base_message_rate * random.uniform(0.5, 2.0),
                 toxicity_baseline=random.uniform(0.02, 0.10),
             )
             channels.append(channel)
         
+        self._channel_by_id = {channel.channel_id: channel for channel in channels}
         return channels
     
-    def _create_users(self) -> Dict[str, dict]:
-        """Create user pool with behavior profiles"""
-        users = {}
-        
-        behavior_distribution = {
-            "normal": 0.80,
-            "chatty": 0.10,
-            "quiet": 0.05,
-            "toxic": 0.03,
-            "spammer": 0.02,
-        }
-        
+    def _create_users(self) -> None:
+        """
+        Create user pool with behavior profiles, stored as parallel arrays
+        indexed by user index (structure of arrays).
+        """
         total_users = self.config.channels * self.config.users_per_channel
+        rng = self._np_rng
+        behaviors = rng.choice(len(UserBehavior), size=total_users, p=_BEHAVIOR_WEIGHTS)
+        rep_low, rep_high = np.array(_REP_RANGES).T
         
-        for i in range(total_users):
-            behavior = random.choices(
-                list(behavior_distribution.keys()),
-                weights=list(behavior_distribution.values())
-            )[0]
-            
-            user_id = f"user_{uuid.uuid4().hex[:8]}"
-            users[user_id] = {
-                "user_id": user_id,
-                "username": f"player_{random.randint(1000, 99999)}",
-                "behavior": behavior,
-                "message_rate_multiplier": self._get_rate_multiplier(behavior),
-                "toxicity_multiplier": self._get_toxicity_multiplier(behavior),
-                "reputation_score": self._get_initial_reputation(behavior),
-            }
+        self._user_ids = [f"user_{n:08x}" for n in rng.integers(0, 1 << 32, total_users).tolist()]
+        self._usernames = [f"player_{n}" for n in rng.integers(1000, 100000, total_users).tolist()]
+        self._user_behavior = behaviors.astype(np.int8)
+        self._user_rate = np.array(_RATE_MULT, dtype=np.float32)[behaviors]
+        self._user_tox = np.array(_TOX_MULT, dtype=np.float32)[behaviors]
+        self._user_rep = np.round(rng.uniform(rep_low[behaviors], rep_high[behaviors]), 3)
         
         # Assign users to channels
-        user_list = list(users.keys())
-        random.shuffle(user_list)
-        
-        for i, channel in enumerate(self.channels):
-            start_idx = i * self.config.users_per_channel
-            end_idx = start_idx + self.config.users_per_channel
-            channel.active_users = user_list[start_idx:end_idx]
-        
-        return users
-    
-    def _get_rate_multiplier(self, behavior: str) -> float:
-        """Get message rate multiplier based on behavior"""
-        multipliers = {
-            "normal": 1.0,
-            "chatty": 3.0,
-            "quiet": 0.3,
-            "toxic": 1.5,
-            "spammer": 10.0,
-        }
-        return multipliers.get(behavior, 1.0)
-    
-    def _get_toxicity_multiplier(self, behavior: str) -> float:
-        """Get toxicity probability multiplier"""
-        multipliers = {
-            "normal": 1.0,
-            "chatty": 1.2,
-            "quiet": 0.5,
-            "toxic": 15.0,
-            "spammer": 0.5,
-        }
-        return multipliers.get(behavior, 1.0)
-    
-    def _get_initial_reputation(self, behavior: str) -> float:
-        """Get initial reputation based on behavior"""
-        ranges = {
-            "normal": (0.50, 0.90),
-            "chatty": (0.40, 0.80),
-            "quiet": (0.60, 0.95),
-            "toxic": (0.10, 0.40),
-            "spammer": (0.05, 0.25),
-        }
-        low, high = ranges.get(behavior, (0.50, 0.80))
-        return round(random.uniform(low, high), 3)
+        members = self._np_rng.permutation(total_users).astype(np.int32)
+        self._channel_members = members.reshape(len(self.channels), self.config.users_per_channel)
+        for channel, channel_members in zip(self.channels, self._channel_members):
+            channel.active_users = channel_members
+            channel._n_users = len(channel_members)
+    
+    @property
+    def users(self) -> Dict[str, dict]:
+        """User profiles keyed by user ID, built on first access"""
+        if self._users is None:
+            self._users = {
+                user_id: {
+                    "user_id": user_id,
+                    "username": username,
+                    "behavior": BEHAVIOR_LABELS[behavior],
+                    "message_rate_multiplier": _RATE_MULT[behavior],
+                    "toxicity_multiplier": _TOX_MULT[behavior],
+                    "reputation_score": reputation,
+                }
+                for user_id, username, behavior, reputation in zip(
+                    self._user_ids, self._usernames,
+                    self._user_behavior.tolist(), self._user_rep.tolist()
+                )
+            }
+        return self._users
+    
+    def _active_attack(self, channel: ChatChannel) -> Optional[ChatPattern]:
+        """Pattern of the channel's ongoing attack; expired attacks are cleared"""
+        attack = self.active_attacks.get(channel.channel_id)
+        if attack is None:
+            return None
+        if time.time_ns() < attack["end_time_ns"]:
+            return attack["pattern"]
+        del self.active_attacks[channel.channel_id]
+        return None
     
     def _check_attack_triggers(self, channel: ChatChannel) -> Optional[ChatPattern]:
         """Check if an attack should be triggered"""
-        if channel.channel_id in self.active_attacks:
-            attack = self.active_attacks[channel.channel_id]
-            if datetime.utcnow() < attack["end_time"]:
-                return attack["pattern"]
-            else:
-                del self.active_attacks[channel.channel_id]
+        active = self._active_attack(channel)
+        if active is not None:
+            return active
         
         # Random attack triggers
         roll = random.random()
@@ -252,11 +354,16 @@ class RealtimeChatSimulator:
     
     def _start_attack(self, channel_id: str, pattern: ChatPattern):
         """Start an attack on a channel"""
+        now_ns = time.time_ns()
+        start = datetime.utcfromtimestamp(now_ns / 1e9)
+        duration = self.config.attack_duration_seconds
         self.active_attacks[channel_id] = {
             "pattern": pattern,
-            "start_time": datetime.utcnow(),
-            "end_time": datetime.utcnow() + timedelta(seconds=self.config.attack_duration_seconds),
-            "attacker_id": f"attacker_{uuid.uuid4().hex[:8]}",
+            "start_time": start,
+            "end_time": start + timedelta(seconds=duration),
+            # Checked per message against time.time_ns()
+            "end_time_ns": now_ns + int(duration * 1_000_000_000),
+            "attacker_id": f"attacker_{random.getrandbits(32):08x}",
         }
     
     def generate_message(self, channel: Optional[ChatChannel] = None) -> ChatMessage:
@@ -270,65 +377,125 @@ class RealtimeChatSimulator:
         if attack_pattern and channel.channel_id not in self.active_attacks:
             self._start_attack(channel.channel_id, attack_pattern)
         
+        rand = random.random
+        rolls = [rand() for _ in range(ROLLS_PER_MESSAGE)]
+        user_idx = int(channel.active_users[int(rand() * channel._n_users)])
+        toxic_hit = rolls[0] < channel.toxicity_baseline * self._user_tox[user_idx]
+        spam_hit = self._user_behavior[user_idx] == _SPAMMER and rolls[1] < 0.3
+        return self._compose_message(channel, attack_pattern, user_idx, toxic_hit, spam_hit, rolls)
+    
+    def generate_batch(self, n: int) -> List[ChatMessage]:
+        """
+        Generate n chat messages from random channels, with every random
+        draw for the batch made up front in bulk from NumPy.
+        """
+        # Attack state is sequential, so walk the draws in order
+        message_from_draw = self._message_from_draw
+        return [message_from_draw(draw) for draw in self._draw_batch(n)[1]]
+    
+    def _draw_batch(self, n: int) -> Tuple[np.ndarray, List[tuple]]:
+        """
+        Bulk random draws for n messages. Returns the channel index of each
+        message and per-message draws for _message_from_draw; no message,
+        metric or attack state is touched until a draw is turned into a message.
+        """
+        channels = self.channels
+        rng = self._np_rng
+        
+        # Step 1: Bulk draws
+        channel_idx = rng.integers(0, len(channels), n)
+        trigger_codes = np.searchsorted(self._attack_thresholds, rng.random(n), side="right").tolist()
+        members = self._channel_members
+        user_idx = members[channel_idx, rng.integers(0, members.shape[1], n)]
+        rolls = rng.random((n, ROLLS_PER_MESSAGE))
+        
+        # Step 2: Per-user thresholds gathered from the user arrays
+        toxic_hit = rolls[:, 0] < self._channel_tox[channel_idx] * self._user_tox[user_idx]
+        spam_hit = (self._user_behavior[user_idx] == _SPAMMER) & (rolls[:, 1] < 0.3)
+        
+        draws = list(zip(
+            channel_idx.tolist(), trigger_codes, user_idx.tolist(),
+            toxic_hit.tolist(), spam_hit.tolist(), rolls.tolist()
+        ))
+        return channel_idx, draws
+    
+    def _message_from_draw(self, draw: tuple) -> ChatMessage:
+        """Apply attack state for one draw and build its message"""
+        ci, code, ui, th, sh, r = draw
+        channel = self.channels[ci]
+        attack_pattern = self._active_attack(channel)
+        if attack_pattern is None:
+            attack_pattern = TRIGGER_PATTERNS[code]
+            if attack_pattern is not None:
+                self._start_attack(channel.channel_id, attack_pattern)
+        return self._compose_message(channel, attack_pattern, ui, th, sh, r)
+    
+    def _compose_message(
+        self,
+        channel: ChatChannel,
+        attack_pattern: Optional[ChatPattern],
+        user_idx: int,
+        toxic_hit: bool,
+        spam_hit: bool,
+        rolls: Sequence[float]
+    ) -> ChatMessage:
+        """
+        Build a message for channel. user_idx is the picked channel member;
+        toxic_hit/spam_hit are its pre-rolled normal-traffic outcomes.
+        """
+        _, _, r_severity, t0, t1, t2 = rolls
+        
         # Generate message based on pattern
-        if attack_pattern == ChatPattern.SPAM_ATTACK:
-            text = ChatMessageGenerator.generate_spam()
-            message_type = MessageType.SPAM
+        if attack_pattern is _SPAM_ATTACK:
+            text = ChatMessageGenerator.spam_from(t0, t1)
+            message_type, violations, severity = _OUTCOME_SPAM
+        elif attack_pattern is _TOXIC_OUTBREAK:
+            text = ChatMessageGenerator.toxic_from(t0)
+            message_type, violations, severity = _OUTCOME_TOXIC_MEDIUM
+        elif attack_pattern is _RAID:
+            text = ChatMessageGenerator.raid_from(t0, t1, t2)
+            message_type, violations, severity = _OUTCOME_NORMAL  # Raids aren't necessarily bad
+        elif spam_hit:
+            # Normal traffic: spammer posting spam
+            text = ChatMessageGenerator.spam_from(t0, t1)
+            message_type, violations, severity = _OUTCOME_SPAM
+        elif toxic_hit:
+            # Normal traffic: under channel baseline x user toxicity multiplier
+            text = ChatMessageGenerator.toxic_from(t0)
+            message_type, violations, severity = (
+                _OUTCOME_TOXIC_LOW if r_severity < 0.5 else _OUTCOME_TOXIC_MEDIUM
+            )
+        else:
+            text = ChatMessageGenerator.normal_from(t0)
+            message_type, violations, severity = _OUTCOME_NORMAL
+        
+        if attack_pattern is _SPAM_ATTACK:
+            # Attackers are outside the user pool
             user_id = self.active_attacks[channel.channel_id]["attacker_id"]
-            violations = [ViolationType.SPAM]
-            severity = SeverityLevel.MEDIUM
-        elif attack_pattern == ChatPattern.TOXIC_OUTBREAK:
-            text = ChatMessageGenerator.generate_toxic()
-            message_type = MessageType.TOXIC
-            user_id = random.choice(channel.active_users)
-            violations = [ViolationType.HARASSMENT]
-            severity = SeverityLevel.MEDIUM
-        elif attack_pattern == ChatPattern.RAID:
-            text = ChatMessageGenerator.generate_raid()
-            message_type = MessageType.NORMAL  # Raids aren't necessarily bad
-            user_id = random.choice(channel.active_users)
-            violations = []
-            severity = SeverityLevel.NONE
+            behavior = "unknown"
+            reputation = 0.5
         else:
-            # Normal message generation
-            user_id = random.choice(channel.active_users)
-            user = self.users.get(user_id, {})
-            
-            # Determine message type based on user behavior and channel baseline
-            toxicity_roll = random.random()
-            toxicity_threshold = channel.toxicity_baseline * user.get("toxicity_multiplier", 1.0)
-            
-            if user.get("behavior") == "spammer" and random.random() < 0.3:
-                text = ChatMessageGenerator.generate_spam()
-                message_type = MessageType.SPAM
-                violations = [ViolationType.SPAM]
-                severity = SeverityLevel.MEDIUM
-            elif toxicity_roll < toxicity_threshold:
-                text = ChatMessageGenerator.generate_toxic()
-                message_type = MessageType.TOXIC
-                violations = [ViolationType.HARASSMENT]
-                severity = random.choice([SeverityLevel.LOW, SeverityLevel.MEDIUM])
-            else:
-                text = ChatMessageGenerator.generate_normal()
-                message_type = MessageType.NORMAL
-                violations = []
-                severity = SeverityLevel.NONE
-        
-        # Create message
+            user_id = self._user_ids[user_idx]
+            behavior = BEHAVIOR_LABELS[self._user_behavior[user_idx]]
+            reputation = float(self._user_rep[user_idx])
+        
+        # Create message; one clock read for both timestamp fields
+        now_ns = time.time_ns()
         message = ChatMessage(
-            message_id=f"msg_{uuid.uuid4().hex[:12]}",
+            message_id=f"msg_{next(self._msg_ids):012x}",
             channel_id=channel.channel_id,
             user_id=user_id,
             content=text,
             message_type=message_type,
-            timestamp=datetime.utcnow(),
+            timestamp=datetime.utcfromtimestamp(now_ns / 1e9),
+            event_time=now_ns // 1_000_000,
             metadata={
-                "channel_type": channel.channel_type,
-                "user_behavior": self.users.get(user_id, {}).get("behavior", "unknown"),
-                "user_reputation": self.users.get(user_id, {}).get("reputation_score", 0.5),
-                "attack_pattern": attack_pattern.value if attack_pattern else None,
-                "expected_violations": [v.value for v in violations],
-                "expected_severity": severity.value,
+                **channel._meta_base,
+                "user_behavior": behavior,
+                "user_reputation": reputation,
+                "attack_pattern": _ATTACK_PATTERN_VALUES[attack_pattern],
+                "expected_violations": violations,
+                "expected_severity": severity,
             }
         )
         
@@ -340,87 +507,130 @@ class RealtimeChatSimulator:
         
         return message
     
-    def generate_stream(self, duration_seconds: Optional[int] = None) -> Generator[ChatMessage, None, None]:
-        """Generate continuous stream of chat messages"""
-        start_time = datetime.utcnow()
+    def generate_stream(
+        self,
+        duration_seconds: Optional[int] = None,
+        pace: bool = True
+    ) -> Generator[ChatMessage, None, None]:
+        """
+        Generate continuous stream of chat messages.
+        
+        Arrivals follow a Poisson process: gaps are exponential with mean
+        1 / (channel rate * channel count), scheduled against a monotonic
+        next-emit time so a slow consumer is never slept on. pace=False
+        disables sleeping entirely for max-throughput runs.
+        """
+        start = time.monotonic()
+        end = start + duration_seconds if duration_seconds else None
+        channel_rates = np.array([channel.message_rate for channel in self.channels]) * len(self.channels)
+        if pace:
+            # Roughly one second of traffic per batch, so attack windows are
+            # evaluated close to when messages are actually emitted
+            batch_size = max(1, min(self.STREAM_BATCH_SIZE, int(channel_rates.mean())))
+        else:
+            batch_size = self.STREAM_BATCH_SIZE
         
+        message_from_draw = self._message_from_draw
+        t_next = start
         while True:
-            if duration_seconds:
-                elapsed = (datetime.utcnow() - start_time).total_seconds()
-                if elapsed >= duration_seconds:
-                    break
-            
-            # Generate message from random channel
-            channel = random.choice(self.channels)
-            yield self.generate_message(channel)
+            # Random draws are made per batch; each message (with its metrics,
+            # attack state and timestamp) is only built when it is emitted
+            channel_idx, draws = self._draw_batch(batch_size)
+            gaps = self._np_rng.exponential(1.0 / channel_rates[channel_idx]).tolist()
             
-            # Sleep based on channel message rate
-            interval = 1.0 / (channel.message_rate * len(self.channels))
-            time.sleep(interval * random.uniform(0.5, 1.5))
+            for draw, gap in zip(draws, gaps):
+                now = time.monotonic()
+                if end is not None and now >= end:
+                    return
+                
+                if pace:
+                    t_next += gap
+                    if t_next > now:
+                        time.sleep(t_next - now)
+                
+                yield message_from_draw(draw)
     
     async def generate_stream_async(
         self, 
         duration_seconds: Optional[int] = None,
-        callback: Optional[Callable[[ChatMessage], None]] = None
+        callback: Optional[Callable[[ChatMessage], Any]] = None,
+        callback_workers: int = 4,
+        callback_queue_size: int = 256
     ):
-        """Async version of stream generation"""
-        start_time = datetime.utcnow()
-        
-        while True:
-            if duration_seconds:
-                elapsed = (datetime.utcnow() - start_time).total_seconds()
-                if elapsed >= duration_seconds:
-                    break
-            
-            channel = random.choice(self.channels)
-            message = self.generate_message(channel)
+        """
+        Async version of stream generation.
+        
+        The callback (sync, or returning an awaitable) runs on
+        callback_workers worker tasks fed through a bounded queue, so a slow
+        callback does not stall generation until the queue is full.
+        """
+        end = time.monotonic() + duration_seconds if duration_seconds else None
+        queue: Optional[asyncio.Queue] = None
+        workers: List[asyncio.Task] = []
+        
+        if callback:
+            queue = asyncio.Queue(maxsize=callback_queue_size)
             
-            if callback:
-                callback(message)
+            async def worker():
+                while True:
+                    message = await queue.get()
+                    try:
+                        result = callback(message)
+                        if inspect.isawaitable(result):
+                            await result
+                    except Exception as e:
+                        print(f"Error in stream callback: {e}")
+                    finally:
+                        queue.task_done()
             
-            yield message
+            workers = [asyncio.create_task(worker()) for _ in range(max(1, callback_workers))]
+        
+        try:
+            while True:
+                if end is not None and time.monotonic() >= end:
+                    break
+                
+                channel = random.choice(self.channels)
+                message = self.generate_message(channel)
+                
+                if queue is not None:
+                    # Blocks only when the queue is full (backpressure)
+                    await queue.put(message)
+                
+                yield message
+                
+                interval = 1.0 / (channel.message_rate * len(self.channels))
+                await asyncio.sleep(interval * random.uniform(0.5, 1.5))
             
-            interval = 1.0 / (channel.message_rate * len(self.channels))
-            await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+            if queue is not None:
+                await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            if workers:
+                await asyncio.gather(*workers, return_exceptions=True)
     
     def simulate_moderation_decision(self, message: ChatMessage) -> FlinkDecision:
         """Simulate a Flink moderation decision for a message"""
-        start_time = time.perf_counter()
-        
         # Simulate processing
         metadata = message.metadata or {}
-        violations = metadata.get("expected_violations", [])
-        severity = metadata.get("expected_severity", "none")
-        
-        if violations:
-            if severity in ["high", "critical"]:
-                decision_type = DecisionType.BLOCK
-                self.metrics["blocked_messages"] += 1
-            elif severity == "medium":
-                decision_type = random.choice([DecisionType.BLOCK, DecisionType.FLAG])
-            else:
-                decision_type = DecisionType.FLAG
-        else:
-            decision_type = DecisionType.ALLOW
-        
-        # Calculate latency (target < 10ms)
-        processing_time = (time.perf_counter() - start_time) * 1000
-        simulated_latency = random.uniform(2.0, 8.0)  # Simulate realistic latency
+        violations = metadata.get("expected_violations", ())
+        severity = metadata.get("expected_severity", 0)
         
-        # Update rolling average
-        alpha = 0.1
-        self.metrics["avg_latency_ms"] = (
-            alpha * simulated_latency + 
-            (1 - alpha) * self.metrics["avg_latency_ms"]
+        metrics = self.metrics
+        decision_type, latency, confidence, risk, metrics["avg_latency_ms"] = _decide(
+            severity, bool(violations), metrics["avg_latency_ms"]
         )
+        if decision_type is DecisionType.BLOCK:
+            metrics["blocked_messages"] += 1
         
         decision = FlinkDecision(
             message_id=message.message_id or message.get_id(),
             decision_type=decision_type,
-            confidence_score=random.uniform(0.7, 0.99) if violations else random.uniform(0.85, 0.99),
-            processing_time_ms=int(simulated_latency),  # Must be int
-            violations_detected=[ViolationType(v) for v in violations],
-            risk_score=random.uniform(0.6, 0.95) if violations else random.uniform(0.05, 0.3),
+            confidence_score=confidence,
+            processing_time_ms=int(latency),  # Must be int
+            violations_detected=[_VIOLATION_BY_VALUE[v] for v in violations],
+            risk_score=risk,
             metadata={
                 "window_id": f"window_{int(time.time()) // 10}",
                 "processor_id": f"flink-{random.randint(1, 4)}",
@@ -429,21 +639,81 @@ class RealtimeChatSimulator:
         
         return decision
     
+    def simulate_moderation_decisions(self, messages: List[ChatMessage]) -> List[FlinkDecision]:
+        """
+        Batched simulate_moderation_decision: all sampling and the latency
+        EMA update for the batch are done in NumPy, then one FlinkDecision
+        is built per message.
+        """
+        n = len(messages)
+        if n == 0:
+            return []
+        rng = self._np_rng
+        metrics = self.metrics
+        
+        # Step 1: Severity codes and violation flags
+        metadatas = [message.metadata or {} for message in messages]
+        violations = [metadata.get("expected_violations", ()) for metadata in metadatas]
+        severity = np.array([metadata.get("expected_severity", 0) for metadata in metadatas])
+        has_violations = np.array([bool(v) for v in violations])
+        
+        # Step 2: Decisions (0 allow, 1 flag, 2 block) from masks
+        block = (severity >= _SEVERITY_HIGH) | ((severity == _SEVERITY_MEDIUM) & (rng.random(n) < 0.5))
+        codes = np.where(has_violations, np.where(block, 2, 1), 0)
+        
+        # Step 3: Scores and latencies
+        latency = rng.uniform(2.0, 8.0, n)
+        confidence = np.where(has_violations, rng.uniform(0.7, 0.99, n), rng.uniform(0.85, 0.99, n))
+        risk = np.where(has_violations, rng.uniform(0.6, 0.95, n), rng.uniform(0.05, 0.3, n))
+        
+        # Step 4: The per-message EMA recursion, in closed form
+        decay = 1 - _LATENCY_EMA_ALPHA
+        weights = _LATENCY_EMA_ALPHA * decay ** np.arange(n - 1, -1, -1)
+        metrics["avg_latency_ms"] = float(decay ** n * metrics["avg_latency_ms"] + weights @ latency)
+        metrics["blocked_messages"] += int(np.count_nonzero(codes == 2))
+        
+        window_id = f"window_{int(time.time()) // 10}"
+        violation_by_value = _VIOLATION_BY_VALUE
+        return [
+            FlinkDecision(
+                message_id=message.message_id or message.get_id(),
+                decision_type=_DECISIONS[code],
+                confidence_score=conf,
+                processing_time_ms=int(lat),
+                violations_detected=[violation_by_value[v] for v in viols],
+                risk_score=rsk,
+                metadata={
+                    "window_id": window_id,
+                    "processor_id": f"flink-{proc}",
+                }
+            )
+            for message, code, conf, lat, viols, rsk, proc in zip(
+                messages, codes.tolist(), confidence.tolist(), latency.tolist(),
+                violations, risk.tolist(), rng.integers(1, 5, n).tolist()
+            )
+        ]
+    
     def get_metrics(self) -> dict:
         """Get simulation metrics"""
         return {
             **self.metrics,
             "active_channels": len(self.channels),
-            "total_users": len(self.users),
+            "total_users": len(self._user_ids),
             "active_attacks": len(self.active_attacks),
             "spam_rate": self.metrics["spam_messages"] / max(1, self.metrics["total_messages"]),
             "toxic_rate": self.metrics["toxic_messages"] / max(1, self.metrics["total_messages"]),
             "block_rate": self.metrics["blocked_messages"] / max(1, self.metrics["total_messages"]),
         }
     
-    def trigger_attack(self, attack_type: str = "spam") -> str:
-        """Manually trigger an attack for testing"""
-        channel = random.choice(self.channels)
+    def get_channel(self, channel_id: str) -> Optional[ChatChannel]:
+        """Look up a channel by ID"""
+        return self._channel_by_id.get(channel_id)
+    
+    def trigger_attack(self, attack_type: str = "spam", channel_id: Optional[str] = None) -> str:
+        """Manually trigger an attack for testing, on a random channel unless one is given"""
+        channel = self.get_channel(channel_id) if channel_id else None
+        if channel is None:
+            channel = random.choice(self.channels)
         
         pattern_map = {
             "spam": ChatPattern.SPAM_ATTACK,
@@ -499,8 +769,8 @@ def main():
     print(f"Attack started on channel: {attack_channel}")
     
     # Generate messages during attack
+    channel = simulator.get_channel(attack_channel)
     for i in range(10):
-        channel = next(c for c in simulator.channels if c.channel_id == attack_channel)
         message = simulator.generate_message(channel)
         decision = simulator.simulate_moderation_decision(message)
         
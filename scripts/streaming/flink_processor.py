@@ -4,11 +4,13 @@ Implements stateful processing, windowing, and exactly-once semantics.
 """
 
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any, Tuple
+import copy
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, List, Optional, Callable, Any, Tuple
 from uuid import UUID
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import OrderedDict
 from abc import ABC, abstractmethod
 import heapq
 
@@ -24,10 +26,20 @@ from streaming.kinesis_consumer import KinesisRecord, KinesisStream, KinesisCons
 # Window Operators
 # ============================================
 
-@dataclass
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+def _epoch_us(ts: datetime) -> int:
+    """Integer microseconds since the Unix epoch; naive datetimes are UTC."""
+    return (ts - (_EPOCH if ts.tzinfo is None else _EPOCH_UTC)) // _ONE_US
+
+
+@dataclass(slots=True)
 class WindowElement:
     """Element in a window with timestamp."""
-    timestamp: datetime
+    timestamp: int  # Epoch microseconds (see _epoch_us)
     data: Any
     key: str
 
@@ -36,8 +48,8 @@ class WindowAssigner(ABC):
     """Base class for window assignment strategies."""
     
     @abstractmethod
-    def assign_windows(self, element: WindowElement) -> List[Tuple[datetime, datetime]]:
-        """Assign element to windows, returning (start, end) tuples."""
+    def assign_windows(self, element: WindowElement) -> List[Tuple[int, int]]:
+        """Assign element to windows, returning (start, end) epoch-microsecond tuples."""
         pass
 
 
@@ -46,14 +58,16 @@ class TumblingWindowAssigner(WindowAssigner):
     
     def __init__(self, window_size_seconds: int):
         self.window_size = timedelta(seconds=window_size_seconds)
+        self._w_us = window_size_seconds * 1_000_000
+        # Spacing between consecutive window starts
+        self.step_us = self._w_us
     
-    def assign_windows(self, element: WindowElement) -> List[Tuple[datetime, datetime]]:
-        window_start = element.timestamp.replace(
-            second=(element.timestamp.second // self.window_size.seconds) * self.window_size.seconds,
-            microsecond=0
-        )
-        window_end = window_start + self.window_size
-        return [(window_start, window_end)]
+    def assign_windows(self, element: WindowElement) -> List[Tuple[int, int]]:
+        # Epoch-aligned bucket; correct for any window size
+        ts_us = element.timestamp
+        w_us = self._w_us
+        start_us = ts_us - ts_us % w_us
+        return [(start_us, start_us + w_us)]
 
 
 class SlidingWindowAssigner(WindowAssigner):
@@ -62,108 +76,362 @@ class SlidingWindowAssigner(WindowAssigner):
     def __init__(self, window_size_seconds: int, slide_seconds: int):
         self.window_size = timedelta(seconds=window_size_seconds)
         self.slide = timedelta(seconds=slide_seconds)
+        self._w_us = window_size_seconds * 1_000_000
+        self._s_us = slide_seconds * 1_000_000
+        # Spacing between consecutive window starts
+        self.step_us = self._s_us
     
-    def assign_windows(self, element: WindowElement) -> List[Tuple[datetime, datetime]]:
-        windows = []
-        # Find all windows this element belongs to
-        window_start = element.timestamp - self.window_size + self.slide
-        
-        while window_start <= element.timestamp:
-            window_end = window_start + self.window_size
-            if window_start <= element.timestamp < window_end:
-                windows.append((window_start, window_end))
-            window_start += self.slide
-        
-        return windows
+    def assign_windows(self, element: WindowElement) -> List[Tuple[int, int]]:
+        """
+        Epoch-aligned windows containing the element, oldest first, as
+        (start, end) epoch microseconds. Window starts are the multiples of
+        the slide in (ts - size, ts], so the first one is found by division.
+        """
+        ts_us = element.timestamp
+        w_us = self._w_us
+        s_us = self._s_us
+        first_start = ((ts_us - w_us) // s_us + 1) * s_us
+        return [(start, start + w_us) for start in range(first_start, ts_us + 1, s_us)]
 
 
 class SessionWindowAssigner(WindowAssigner):
-    """Activity-based windows with gap detection."""
+    """
+    Activity-based windows with gap detection.
+    
+    Sessions idle for longer than the gap (in event time) are pruned lazily
+    from a min-heap of (expiry, key), so the session table stays bounded.
+    """
     
     def __init__(self, gap_seconds: int):
         self.gap = timedelta(seconds=gap_seconds)
-        self.sessions: Dict[str, Tuple[datetime, datetime]] = {}
+        self._gap_us = gap_seconds * 1_000_000
+        self.sessions: Dict[str, Tuple[int, int]] = {}
+        self._expiry_heap: List[Tuple[int, str]] = []
     
-    def assign_windows(self, element: WindowElement) -> List[Tuple[datetime, datetime]]:
+    def _expire(self, now_us: int) -> None:
+        """Drop sessions whose gap has elapsed by now_us."""
+        heap = self._expiry_heap
+        sessions = self.sessions
+        gap_us = self._gap_us
+        while heap and heap[0][0] < now_us:
+            _, key = heapq.heappop(heap)
+            session = sessions.get(key)
+            # Extended sessions have a later heap entry; only drop if still stale
+            if session is not None and session[1] + gap_us < now_us:
+                del sessions[key]
+    
+    def assign_windows(self, element: WindowElement) -> List[Tuple[int, int]]:
         key = element.key
+        ts_us = element.timestamp
+        self._expire(ts_us)
         
-        if key in self.sessions:
-            session_start, session_end = self.sessions[key]
-            
-            # Check if within gap
-            if element.timestamp <= session_end + self.gap:
-                # Extend session
-                new_end = max(session_end, element.timestamp)
-                self.sessions[key] = (session_start, new_end)
-                return [(session_start, new_end)]
-            else:
-                # New session
-                self.sessions[key] = (element.timestamp, element.timestamp)
-                return [(element.timestamp, element.timestamp)]
+        session = self.sessions.get(key)
+        if session is not None and ts_us <= session[1] + self._gap_us:
+            # Extend session
+            session = (session[0], max(session[1], ts_us))
         else:
-            # First element for this key
-            self.sessions[key] = (element.timestamp, element.timestamp)
-            return [(element.timestamp, element.timestamp)]
+            # New session (first element for this key, or past the gap)
+            session = (ts_us, ts_us)
+        
+        self.sessions[key] = session
+        heapq.heappush(self._expiry_heap, (session[1] + self._gap_us, key))
+        return [session]
+
+
+class WindowCounter:
+    """
+    Element counts for one key's windows, in a fixed ring of slots indexed
+    by window start / step_us, so old windows are overwritten rather than
+    kept forever.
+    """
+    
+    __slots__ = ("step_us", "starts", "counts")
+    
+    def __init__(self, step_us: int, slots: int = 8):
+        self.step_us = step_us
+        self.starts: List[Optional[int]] = [None] * slots
+        self.counts: List[int] = [0] * slots
+    
+    def __copy__(self) -> "WindowCounter":
+        # Checkpoints copy state values; the slot lists are mutated in place
+        counter = WindowCounter.__new__(WindowCounter)
+        counter.step_us = self.step_us
+        counter.starts = self.starts[:]
+        counter.counts = self.counts[:]
+        return counter
+    
+    def add(self, windows: List[Tuple[int, int]]) -> int:
+        """Count one element in each of its windows; return the largest count."""
+        starts = self.starts
+        counts = self.counts
+        step_us = self.step_us
+        n_slots = len(starts)
+        largest = 0
+        
+        for window_start, _ in windows:
+            slot = (window_start // step_us) % n_slots
+            slot_start = starts[slot]
+            if slot_start != window_start:
+                if slot_start is not None and slot_start > window_start:
+                    # Older than the ring retains: count the element alone
+                    largest = max(largest, 1)
+                    continue
+                starts[slot] = window_start
+                counts[slot] = 0
+            counts[slot] += 1
+            if counts[slot] > largest:
+                largest = counts[slot]
+        
+        return largest
 
 
 # ============================================
 # State Backend
 # ============================================
 
+# Checkpoint delta marker for a removed state entry
+_DELETED = object()
+
+
 class StateBackend:
     """
     Simulated Flink state backend.
     In production, use RocksDB or other distributed state store.
+    
+    Keyed state is an LRU bounded at max_keys (cold keys are dropped).
+    Checkpoints are incremental: each stores the (key, state name) entries
+    changed since its parent, and restore replays the parent chain from the
+    nearest full snapshot, taken every full_snapshot_interval checkpoints.
+    Values are shallow-copied into checkpoints and back out on restore, so
+    callers may mutate state objects in place between checkpoints.
     """
     
-    def __init__(self):
-        self.keyed_state: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    def __init__(self, max_keys: int = 100_000, full_snapshot_interval: int = 10):
+        self.max_keys = max_keys
+        self.full_snapshot_interval = full_snapshot_interval
+        self.keyed_state: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.operator_state: Dict[str, Any] = {}
         self.checkpoints: List[Dict[str, Any]] = []
+        # (key, state name) changed since the last checkpoint; a None state
+        # name means the whole key was evicted
+        self._dirty: set = set()
+        # Checkpoint the live state descends from
+        self._head: Optional[int] = None
+        self._checkpointed_operator_state: Dict[str, Any] = {}
     
-    def get_keyed_state(self, key: str, state_name: str) -> Optional[Any]:
+    def get_keyed_state(self, key: str, state_name: Hashable) -> Optional[Any]:
         """Get keyed state value."""
-        return self.keyed_state[key].get(state_name)
+        state = self.keyed_state.get(key)
+        if state is None:
+            return None
+        self.keyed_state.move_to_end(key)
+        return state.get(state_name)
     
-    def update_keyed_state(self, key: str, state_name: str, value: Any) -> None:
+    def update_keyed_state(self, key: str, state_name: Hashable, value: Any) -> None:
         """Update keyed state value."""
-        self.keyed_state[key][state_name] = value
+        keyed_state = self.keyed_state
+        state = keyed_state.get(key)
+        if state is None:
+            state = keyed_state[key] = {}
+            if len(keyed_state) > self.max_keys:
+                evicted, _ = keyed_state.popitem(last=False)
+                self._dirty.add((evicted, None))
+        else:
+            keyed_state.move_to_end(key)
+        state[state_name] = value
+        self._dirty.add((key, state_name))
     
-    def clear_keyed_state(self, key: str, state_name: str) -> None:
+    def clear_keyed_state(self, key: str, state_name: Hashable) -> None:
         """Clear keyed state."""
-        if state_name in self.keyed_state[key]:
-            del self.keyed_state[key][state_name]
+        state = self.keyed_state.get(key)
+        if state is not None and state_name in state:
+            del state[state_name]
+            self._dirty.add((key, state_name))
+    
+    def has_changes(self) -> bool:
+        """Whether any state changed since the last checkpoint."""
+        if self._dirty or self._head is None:
+            return True
+        previous = self._checkpointed_operator_state
+        return len(previous) != len(self.operator_state) or any(
+            previous.get(name, _DELETED) is not value
+            for name, value in self.operator_state.items()
+        )
     
     def checkpoint(self) -> int:
         """Create a checkpoint, return checkpoint ID."""
+        keyed_state = self.keyed_state
+        operator_state = self.operator_state
+        head = self._head
+        depth = 0 if head is None else self.checkpoints[head]['depth'] + 1
+        full = depth == 0 or depth >= self.full_snapshot_interval
+        
+        if full:
+            depth = 0
+            delta = {
+                (key, name): copy.copy(value)
+                for key, state in keyed_state.items()
+                for name, value in state.items()
+            }
+            op_delta = dict(operator_state)
+        else:
+            delta = {}
+            # Whole-key drops first, so entries re-added after an eviction win
+            for key, name in sorted(self._dirty, key=lambda entry: entry[1] is not None):
+                state = keyed_state.get(key)
+                if name is None:
+                    delta[(key, None)] = _DELETED
+                else:
+                    value = _DELETED if state is None else state.get(name, _DELETED)
+                    delta[(key, name)] = value if value is _DELETED else copy.copy(value)
+            previous = self._checkpointed_operator_state
+            op_delta = {
+                name: value for name, value in operator_state.items()
+                if previous.get(name, _DELETED) is not value
+            }
+            op_delta.update((name, _DELETED) for name in previous if name not in operator_state)
+        
         checkpoint = {
             'id': len(self.checkpoints),
-            'keyed_state': dict(self.keyed_state),
-            'operator_state': dict(self.operator_state),
+            'parent_id': None if full else head,
+            'depth': depth,
+            'delta': delta,
+            'op_delta': op_delta,
             'timestamp': datetime.utcnow()
         }
         self.checkpoints.append(checkpoint)
+        self._head = checkpoint['id']
+        self._dirty = set()
+        self._checkpointed_operator_state = dict(operator_state)
         return checkpoint['id']
     
     def restore(self, checkpoint_id: int) -> None:
         """Restore from checkpoint."""
         if checkpoint_id < len(self.checkpoints):
-            checkpoint = self.checkpoints[checkpoint_id]
-            self.keyed_state = defaultdict(dict, checkpoint['keyed_state'])
-            self.operator_state = checkpoint['operator_state']
+            # Walk back to the full snapshot, then replay forwards
+            chain = []
+            checkpoint_ref: Optional[int] = checkpoint_id
+            while checkpoint_ref is not None:
+                chain.append(self.checkpoints[checkpoint_ref])
+                checkpoint_ref = chain[-1]['parent_id']
+            
+            keyed_state: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+            operator_state: Dict[str, Any] = {}
+            for checkpoint in reversed(chain):
+                for (key, name), value in checkpoint['delta'].items():
+                    if name is None:
+                        keyed_state.pop(key, None)
+                    elif value is _DELETED:
+                        state = keyed_state.get(key)
+                        if state is not None:
+                            state.pop(name, None)
+                    else:
+                        keyed_state.setdefault(key, {})[name] = copy.copy(value)
+                for name, value in checkpoint['op_delta'].items():
+                    if value is _DELETED:
+                        operator_state.pop(name, None)
+                    else:
+                        operator_state[name] = value
+            
+            self.keyed_state = keyed_state
+            self.operator_state = operator_state
+            self._checkpointed_operator_state = dict(operator_state)
+            self._head = checkpoint_id
+            self._dirty = set()
+
+
+# ============================================
+# Text Features
+# ============================================
+
+TOXIC_WORDS = ('hate', 'stupid', 'idiot', 'kill')
+_ASCII_UPPER = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def _score_text(text: str) -> Tuple[float, float, int]:
+    """
+    Per-message text features in C-level string operations:
+    (toxicity score, uppercase ratio, 'http' count).
+    """
+    text_lower = text.lower()
+    toxicity = min(1.0, sum(w in text_lower for w in TOXIC_WORDS) * 0.3)
+    
+    n = len(text)
+    if n == 0:
+        return toxicity, 0.0, 0
+    if text.isascii():
+        # Uppercase letters are the bytes the translate deletes
+        raw = text.encode('ascii')
+        upper = n - len(raw.translate(None, _ASCII_UPPER))
+    else:
+        upper = sum(map(str.isupper, text))
+    return toxicity, upper / n, text.count('http')
+
+
+# ============================================
+# Record Parsing Caches
+# ============================================
+
+_ZERO_UUID_STR = str(UUID(int=0))
+
+# Few distinct channels: keep one shared str per channel ID
+_CHANNEL_INTERN_MAX = 1024
+_CHANNEL_INTERN: Dict[str, str] = {}
+
+# Parsed user UUIDs, LRU-bounded
+_UUID_CACHE_MAX = 65_536
+_UUID_CACHE: "OrderedDict[str, UUID]" = OrderedDict()
+
+
+def _intern_channel(raw: str) -> str:
+    """Shared instance of a channel ID string, while the table has room."""
+    interned = _CHANNEL_INTERN.get(raw)
+    if interned is not None:
+        return interned
+    if len(_CHANNEL_INTERN) < _CHANNEL_INTERN_MAX:
+        _CHANNEL_INTERN[raw] = raw
+    return raw
+
+
+def _cached_uuid(raw: str) -> UUID:
+    """UUID(raw), parsed once per distinct string."""
+    cache = _UUID_CACHE
+    value = cache.get(raw)
+    if value is None:
+        value = cache[raw] = UUID(raw)
+        if len(cache) > _UUID_CACHE_MAX:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(raw)
+    return value
 
 
 # ============================================
 # Flink Operators
 # ============================================
 
-@dataclass
+# SeverityLevel members by value, for int severities computed in the hot path
+_SEVERITY_LEVELS = tuple(SeverityLevel)
+
+# Duplicate detection: per-user Bloom filters of BLOOM_BITS bits probed at
+# BLOOM_PROBES positions (10-bit slices of the text hash). Two generations
+# rotate every BLOOM_GENERATION messages, so the filter remembers the last
+# 50-100 messages; the false-positive rate stays around 0.2%.
+BLOOM_BITS = 1024
+BLOOM_PROBES = 4
+BLOOM_GENERATION = 50
+
+
+@dataclass(slots=True)
 class UserMessageState:
     """State tracking for a user's messages."""
     message_count: int = 0
     violation_count: int = 0
-    last_message_time: Optional[datetime] = None
-    recent_hashes: List[str] = field(default_factory=list)
+    last_message_time: Optional[int] = None  # Epoch microseconds
+    # Recent message Bloom filters (see BLOOM_BITS)
+    bloom_current: int = 0
+    bloom_previous: int = 0
+    bloom_count: int = 0
     velocity: float = 0.0
 
 
@@ -180,6 +448,10 @@ class ModerationFlinkProcessor:
         self.tumbling_1m = TumblingWindowAssigner(60)
         self.sliding_5m = SlidingWindowAssigner(300, 60)
         self.session_assigner = SessionWindowAssigner(120)
+        self._window_steps = {
+            'count_1m': self.tumbling_1m.step_us,
+            'count_5m': self.sliding_5m.step_us,
+        }
         
         # Watermark tracking (for event-time processing)
         self.current_watermark = datetime.utcnow()
@@ -196,12 +468,16 @@ class ModerationFlinkProcessor:
     async def process_stream(
         self, 
         consumer: KinesisConsumer,
-        output_handler: Callable[[FlinkDecision], None]
+        output_handler: Callable[[FlinkDecision], None],
+        checkpoint_interval_seconds: Optional[float] = 60.0
     ) -> None:
         """
         Main processing loop - consumes from Kinesis and outputs decisions.
+        Checkpoints are taken by a background task every
+        checkpoint_interval_seconds (None disables them).
         """
         async def batch_processor(records: List[KinesisRecord]):
+            messages = []
             for record in records:
                 try:
                     data = record.decode_data()
@@ -209,25 +485,55 @@ class ModerationFlinkProcessor:
                     # Parse as chat message
                     message = self._parse_chat_message(data)
                     if message:
-                        decision = await self.process_message(message)
-                        output_handler(decision)
+                        messages.append(message)
                 
                 except Exception as e:
                     print(f"Error processing record: {e}")
+            
+            if not messages:
+                return
+            try:
+                decisions = await self.process_batch(messages)
+            except Exception as e:
+                print(f"Error processing batch: {e}")
+                return
+            for decision in decisions:
+                output_handler(decision)
         
         consumer.processor = batch_processor
-        await consumer.start()
+        checkpointer = None
+        if checkpoint_interval_seconds:
+            checkpointer = asyncio.create_task(self._checkpoint_loop(checkpoint_interval_seconds))
+        try:
+            await consumer.start()
+        finally:
+            if checkpointer is not None:
+                checkpointer.cancel()
+    
+    async def _checkpoint_loop(self, interval_seconds: float) -> None:
+        """Checkpoint periodically, skipping intervals with no state changes."""
+        # Runs on the event loop between batches (process_batch never awaits
+        # mid-update), so each checkpoint sees consistent state without locks
+        while True:
+            await asyncio.sleep(interval_seconds)
+            if not self.state.has_changes():
+                continue
+            try:
+                self.create_checkpoint()
+            except Exception as e:
+                print(f"Error creating checkpoint: {e}")
     
     def _parse_chat_message(self, data: Dict[str, Any]) -> Optional[ChatMessage]:
         """Parse Kinesis record data into ChatMessage."""
         try:
             payload = data.get('payload', data)
+            timestamp = payload.get('timestamp')
             return ChatMessage(
-                id=UUID(payload.get('message_id', str(UUID(int=0)))),
-                user_id=UUID(payload.get('user_id', str(UUID(int=0)))),
-                channel_id=payload.get('channel_id', 'unknown'),
+                id=UUID(payload.get('message_id', _ZERO_UUID_STR)),
+                user_id=_cached_uuid(payload.get('user_id', _ZERO_UUID_STR)),
+                channel_id=_intern_channel(payload.get('channel_id', 'unknown')),
                 text=payload.get('text', ''),
-                timestamp=datetime.fromisoformat(payload.get('timestamp', datetime.utcnow().isoformat()))
+                timestamp=datetime.fromisoformat(timestamp) if timestamp is not None else datetime.utcnow()
             )
         except Exception:
             return None
@@ -237,25 +543,91 @@ class ModerationFlinkProcessor:
         Process a single message with stateful operations.
         Implements the core Flink processing logic.
         """
-        self.metrics['records_processed'] += 1
-        start_time = datetime.utcnow()
+        t0 = time.monotonic_ns()
         
+        # 1. Watermark / late data
+        self._advance_watermark(message)
+        
+        # 2. Get keyed state for user, process, write back
         user_key = str(message.user_id)
-        channel_key = message.channel_id
+        user_state = self._get_user_state(user_key)
+        decision = self._process_with_state(message, user_key, user_state, _score_text(message.text))
+        self._update_user_state(user_key, user_state)
         
-        # 1. Check watermark for late data handling
-        if message.timestamp < self.current_watermark - self.allowed_lateness:
-            self.metrics['late_records'] += 1
+        decision.processing_time_ms = (time.monotonic_ns() - t0) // 1_000_000
+        return decision
+    
+    async def process_batch(self, messages: List[ChatMessage]) -> List[FlinkDecision]:
+        """
+        Process a batch of messages; decisions are returned in input order.
         
-        # Update watermark
+        Each user's state is loaded and written back once per batch, with
+        that user's messages applied in arrival order. A message that fails
+        is logged and dropped on its own; the rest of the batch still runs.
+        """
+        t0 = time.monotonic_ns()
+        
+        # Step 1: Watermark in arrival order; text features per message
+        accepted: List[ChatMessage] = []
+        features: List[Tuple[float, float, int]] = []
+        for message in messages:
+            try:
+                self._advance_watermark(message)
+                features.append(_score_text(message.text))
+            except Exception as e:
+                print(f"Error processing record: {e}")
+                continue
+            accepted.append(message)
+        messages = accepted
+        
+        # Step 2: Group by user, preserving order within each user
+        by_user: Dict[str, List[int]] = {}
+        for i, message in enumerate(messages):
+            by_user.setdefault(str(message.user_id), []).append(i)
+        
+        # Step 3: One state load and write-back per user
+        decisions: List[Optional[FlinkDecision]] = [None] * len(messages)
+        for user_key, indices in by_user.items():
+            user_state = self._get_user_state(user_key)
+            for i in indices:
+                try:
+                    decisions[i] = self._process_with_state(messages[i], user_key, user_state, features[i])
+                except Exception as e:
+                    print(f"Error processing record: {e}")
+            self._update_user_state(user_key, user_state)
+        decisions = [decision for decision in decisions if decision is not None]
+        
+        # Batch latency, amortized per message
+        processing_time = (time.monotonic_ns() - t0) // (1_000_000 * max(1, len(messages)))
+        for decision in decisions:
+            decision.processing_time_ms = processing_time
+        return decisions
+    
+    def _advance_watermark(self, message: ChatMessage) -> None:
+        """Count late records and advance the event-time watermark."""
+        # Compare first: a timestamp that can't be compared (offset-aware)
+        # raises before any metric or the watermark changes
+        is_late = message.timestamp < self.current_watermark - self.allowed_lateness
+        self.metrics['records_processed'] += 1
+        if is_late:
+            self.metrics['late_records'] += 1
         self.current_watermark = max(self.current_watermark, message.timestamp)
-        
-        # 2. Get/update keyed state for user
-        user_state = self._get_user_state(user_key)
-        
+    
+    def _process_with_state(
+        self,
+        message: ChatMessage,
+        user_key: str,
+        user_state: UserMessageState,
+        features: Tuple[float, float, int]
+    ) -> FlinkDecision:
+        """
+        Windowing, features and decision for one message against loaded
+        user state; the caller writes the state back.
+        """
         # 3. Window assignment
+        ts_us = _epoch_us(message.timestamp)
         element = WindowElement(
-            timestamp=message.timestamp,
+            timestamp=ts_us,
             data=message,
             key=user_key
         )
@@ -267,18 +639,17 @@ class ModerationFlinkProcessor:
         msg_count_1m = self._update_window_count(user_key, 'count_1m', windows_1m)
         msg_count_5m = self._update_window_count(user_key, 'count_5m', windows_5m)
         
-        # 5. Compute features for decision
-        spam_score = self._compute_spam_score(message.text, user_state)
-        toxicity_score = self._compute_toxicity_score(message.text)
+        # 5. Compute features for decision (text features from _score_text)
+        toxicity_score, upper_ratio, http_count = features
+        spam_score = self._compute_spam_score(upper_ratio, http_count, user_state)
         is_duplicate = self._check_duplicate(message.text, user_state)
         is_rate_limited = msg_count_1m > 10
-        is_bursting = self._detect_burst(user_state, message.timestamp)
+        is_bursting = self._detect_burst(user_state, ts_us)
         
-        # 6. Update user state
+        # 6. Update user state (velocity first: it needs the previous message time)
         user_state.message_count += 1
-        user_state.last_message_time = message.timestamp
-        user_state.velocity = self._compute_velocity(user_state, message.timestamp)
-        self._update_user_state(user_key, user_state)
+        user_state.velocity = self._compute_velocity(user_state, ts_us)
+        user_state.last_message_time = ts_us
         
         # 7. Make decision
         decision = self._make_decision(
@@ -293,56 +664,44 @@ class ModerationFlinkProcessor:
         )
         
         # 8. Update metrics
-        processing_time = int((datetime.utcnow() - start_time).total_seconds() * 1000)
-        decision.processing_time_ms = processing_time
         self.metrics['decisions_made'] += 1
         
         return decision
     
     def _get_user_state(self, user_key: str) -> UserMessageState:
-        """Get user state from backend."""
-        state_data = self.state.get_keyed_state(user_key, 'user_state')
-        if state_data:
-            return UserMessageState(**state_data)
-        return UserMessageState()
+        """Get the user's live state object from the backend."""
+        state = self.state.get_keyed_state(user_key, 'user_state')
+        if state is None:
+            return UserMessageState()
+        return state
     
     def _update_user_state(self, user_key: str, state: UserMessageState) -> None:
-        """Update user state in backend."""
-        self.state.update_keyed_state(user_key, 'user_state', {
-            'message_count': state.message_count,
-            'violation_count': state.violation_count,
-            'last_message_time': state.last_message_time.isoformat() if state.last_message_time else None,
-            'recent_hashes': state.recent_hashes[-100:],  # Keep last 100
-            'velocity': state.velocity,
-        })
+        """Store (or mark changed) the user's state in the backend."""
+        self.state.update_keyed_state(user_key, 'user_state', state)
     
     def _update_window_count(
         self, 
         key: str, 
         window_name: str, 
-        windows: List[Tuple[datetime, datetime]]
+        windows: List[Tuple[int, int]]
     ) -> int:
         """Update count in windows, return current count."""
-        total_count = 0
-        
-        for window_start, window_end in windows:
-            window_key = f"{window_name}:{window_start.isoformat()}"
-            current = self.state.get_keyed_state(key, window_key) or 0
-            new_count = current + 1
-            self.state.update_keyed_state(key, window_key, new_count)
-            total_count = max(total_count, new_count)
-        
+        counter = self.state.get_keyed_state(key, window_name)
+        if counter is None:
+            counter = WindowCounter(self._window_steps[window_name])
+        total_count = counter.add(windows)
+        self.state.update_keyed_state(key, window_name, counter)
         return total_count
     
-    def _compute_spam_score(self, text: str, state: UserMessageState) -> float:
-        """Compute spam score based on text and user behavior."""
+    def _compute_spam_score(self, upper_ratio: float, http_count: int, state: UserMessageState) -> float:
+        """Compute spam score from text features (see _score_text) and user behavior."""
         score = 0.0
         
         # Check patterns
-        if text.count('http') > 2:
+        if http_count > 2:
             score += 0.4
         
-        if len(text) > 0 and sum(1 for c in text if c.isupper()) / len(text) > 0.7:
+        if upper_ratio > 0.7:
             score += 0.3
         
         # Check velocity
@@ -353,35 +712,40 @@ class ModerationFlinkProcessor:
     
     def _compute_toxicity_score(self, text: str) -> float:
         """Fast toxicity scoring."""
-        toxic_words = ['hate', 'stupid', 'idiot', 'kill']
-        text_lower = text.lower()
-        matches = sum(1 for w in toxic_words if w in text_lower)
-        return min(1.0, matches * 0.3)
+        return _score_text(text)[0]
     
     def _check_duplicate(self, text: str, state: UserMessageState) -> bool:
         """Check for duplicate messages."""
-        import hashlib
-        text_hash = hashlib.md5(text.lower().encode()).hexdigest()[:16]
+        text_hash = hash(text.lower())
+        mask = 0
+        for probe in range(BLOOM_PROBES):
+            mask |= 1 << ((text_hash >> (10 * probe)) & (BLOOM_BITS - 1))
+        
+        is_dup = (state.bloom_current & mask) == mask or (state.bloom_previous & mask) == mask
         
-        is_dup = text_hash in state.recent_hashes
-        state.recent_hashes.append(text_hash)
+        if state.bloom_count >= BLOOM_GENERATION:
+            state.bloom_previous = state.bloom_current
+            state.bloom_current = 0
+            state.bloom_count = 0
+        state.bloom_current |= mask
+        state.bloom_count += 1
         
         return is_dup
     
-    def _detect_burst(self, state: UserMessageState, current_time: datetime) -> bool:
+    def _detect_burst(self, state: UserMessageState, current_time_us: int) -> bool:
         """Detect burst activity."""
         if state.last_message_time is None:
             return False
         
-        time_diff = (current_time - state.last_message_time).total_seconds()
+        time_diff = (current_time_us - state.last_message_time) / 1_000_000
         return time_diff < 0.5 and state.velocity > 2.0
     
-    def _compute_velocity(self, state: UserMessageState, current_time: datetime) -> float:
+    def _compute_velocity(self, state: UserMessageState, current_time_us: int) -> float:
         """Compute message velocity (messages per second)."""
         if state.last_message_time is None:
             return 0.0
         
-        time_diff = (current_time - state.last_message_time).total_seconds()
+        time_diff = (current_time_us - state.last_message_time) / 1_000_000
         if time_diff <= 0:
             return state.velocity
         
@@ -403,22 +767,24 @@ class ModerationFlinkProcessor:
     ) -> FlinkDecision:
         """Make final moderation decision."""
         violations: List[ViolationType] = []
-        severity = SeverityLevel.NONE
+        # Plain int severity; converted to SeverityLevel once at the end
+        severity = 0
         should_block = False
         
         if spam_score > 0.7:
             violations.append(ViolationType.SPAM)
-            severity = SeverityLevel.MEDIUM
+            severity = 2  # MEDIUM
             should_block = True
         
         if toxicity_score > 0.8:
             violations.append(ViolationType.HARASSMENT)
-            severity = max(severity, SeverityLevel.HIGH)
+            severity = 3  # HIGH
             should_block = True
         
         if is_duplicate:
             violations.append(ViolationType.SPAM)
-            severity = max(severity, SeverityLevel.LOW)
+            if severity < 1:
+                severity = 1  # LOW
         
         if is_rate_limited:
             should_block = True
@@ -428,7 +794,7 @@ class ModerationFlinkProcessor:
             user_id=message.user_id,
             channel_id=message.channel_id,
             decision=ContentStatus.REJECTED if should_block else ContentStatus.APPROVED,
-            severity=severity,
+            severity=_SEVERITY_LEVELS[severity],
             violations=violations,
             spam_score=spam_score,
             toxicity_score=toxicity_score,
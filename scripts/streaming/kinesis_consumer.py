@@ -4,7 +4,9 @@ Handles both Flow A (async) and Flow B (real-time) streams.
 """
 
 import asyncio
+import hashlib
 import json
+from concurrent.futures import Executor
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Callable, AsyncGenerator
 from uuid import UUID, uuid4
@@ -17,6 +19,10 @@ from models.content import Content
 from models.enums import ContentType, StreamSource
 
 
+# Encoder built once instead of per json.dumps call; compact separators
+_encode_json = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
 class ShardIteratorType(str, Enum):
     """Kinesis shard iterator types."""
     TRIM_HORIZON = "TRIM_HORIZON"
@@ -36,7 +42,8 @@ class KinesisRecord:
     
     def decode_data(self) -> Dict[str, Any]:
         """Decode record data from bytes to dict."""
-        return json.loads(self.data.decode('utf-8'))
+        # json.loads detects UTF-8 bytes itself; no intermediate str
+        return json.loads(self.data)
 
 
 @dataclass
@@ -45,6 +52,8 @@ class KinesisShard:
     shard_id: str
     records: List[KinesisRecord] = field(default_factory=list)
     sequence_counter: int = 0
+    # sequence_number -> index in records, so reads don't scan the shard
+    _seq_to_idx: Dict[str, int] = field(default_factory=dict, repr=False)
     
     def put_record(self, partition_key: str, data: bytes) -> str:
         """Add a record to the shard."""
@@ -56,6 +65,7 @@ class KinesisShard:
             partition_key=partition_key,
             data=data
         )
+        self._seq_to_idx[sequence_number] = len(self.records)
         self.records.append(record)
         return sequence_number
     
@@ -64,12 +74,7 @@ class KinesisShard:
         if start_sequence is None:
             return self.records[:limit]
         
-        start_idx = 0
-        for i, record in enumerate(self.records):
-            if record.sequence_number == start_sequence:
-                start_idx = i + 1
-                break
-        
+        start_idx = self._seq_to_idx.get(start_sequence, -1) + 1
         return self.records[start_idx:start_idx + limit]
 
 
@@ -86,18 +91,22 @@ class KinesisStream:
             for i in range(shard_count)
         }
         self.shard_count = shard_count
+        self._shard_list = list(self.shards.values())
     
     def _get_shard_for_key(self, partition_key: str) -> KinesisShard:
-        """Determine shard based on partition key hash."""
-        key_hash = hash(partition_key)
-        shard_idx = abs(key_hash) % self.shard_count
-        shard_id = f"shard-{shard_idx:03d}"
-        return self.shards[shard_id]
+        """
+        Determine shard based on partition key hash.
+        Like Kinesis: MD5 of the key as a 128-bit integer, with the key space
+        split evenly across shards. Unlike hash(), stable across processes.
+        """
+        key_hash = int.from_bytes(hashlib.md5(partition_key.encode('utf-8')).digest(), 'big')
+        shard_idx = (key_hash * self.shard_count) >> 128
+        return self._shard_list[shard_idx]
     
     def put_record(self, partition_key: str, data: Dict[str, Any]) -> str:
         """Put a record to the stream."""
         shard = self._get_shard_for_key(partition_key)
-        data_bytes = json.dumps(data, default=str).encode('utf-8')
+        data_bytes = _encode_json(data).encode('utf-8')
         return shard.put_record(partition_key, data_bytes)
     
     def put_records(self, records: List[Dict[str, Any]]) -> List[str]:
@@ -128,12 +137,19 @@ class KinesisStream:
         if shard_id not in self.shards:
             return [], shard_iterator
         
+        # Resume after the iterator's sequence number, if it carries one
+        start_sequence = None
+        if len(parts) == 3 and parts[1] == ShardIteratorType.AFTER_SEQUENCE_NUMBER.value and parts[2] != 'NONE':
+            start_sequence = parts[2]
+        
         shard = self.shards[shard_id]
-        records = shard.get_records(limit=limit)
+        records = shard.get_records(start_sequence, limit=limit)
+        if not records:
+            # Nothing new; keep polling from the same position
+            return records, shard_iterator
         
         # Return next iterator
-        next_seq = records[-1].sequence_number if records else None
-        next_iterator = f"{shard_id}:AFTER_SEQUENCE_NUMBER:{next_seq or 'NONE'}"
+        next_iterator = f"{shard_id}:AFTER_SEQUENCE_NUMBER:{records[-1].sequence_number}"
         
         return records, next_iterator
 
@@ -148,25 +164,33 @@ class KinesisConsumer:
         self, 
         stream: KinesisStream,
         consumer_name: str,
-        processor: Callable[[List[KinesisRecord]], None]
+        processor: Callable[[List[KinesisRecord]], None],
+        max_inflight_batches: int = 2,
+        poll_interval: float = 0.1,
+        max_poll_interval: float = 2.0,
+        executor: Optional[Executor] = None
     ):
         self.stream = stream
         self.consumer_name = consumer_name
         self.processor = processor
         self.checkpoints: Dict[str, KinesisCheckpoint] = {}
         self.running = False
+        # At most this many fetched batches are being processed at once;
+        # shard loops wait here instead of pulling more records
+        self._inflight = asyncio.Semaphore(max(1, max_inflight_batches))
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        # Synchronous processors run here, off the event loop, if given
+        self.executor = executor
     
     async def start(self) -> None:
         """Start consuming from all shards."""
         self.running = True
         
-        # Create tasks for each shard
-        tasks = [
-            self._consume_shard(shard_id)
-            for shard_id in self.stream.shards.keys()
-        ]
-        
-        await asyncio.gather(*tasks)
+        # One task per shard; a failing shard cancels the others
+        async with asyncio.TaskGroup() as group:
+            for shard_id in self.stream.shards.keys():
+                group.create_task(self._consume_shard(shard_id))
     
     def stop(self) -> None:
         """Stop the consumer."""
@@ -189,13 +213,18 @@ class KinesisConsumer:
                 ShardIteratorType.LATEST
             )
         
+        idle_sleep = self.poll_interval
+        
         while self.running:
-            records, next_iterator = self.stream.get_records(iterator, limit=100)
+            # Wait for a processing slot before fetching the next batch
+            async with self._inflight:
+                records, next_iterator = self.stream.get_records(iterator, limit=100)
+                
+                if records:
+                    # Process records
+                    await self._process_records(records)
             
             if records:
-                # Process records
-                await self._process_records(records)
-                
                 # Update checkpoint
                 last_record = records[-1]
                 self.checkpoints[shard_id] = KinesisCheckpoint(
@@ -203,14 +232,23 @@ class KinesisConsumer:
                     sequence_number=last_record.sequence_number,
                     consumer_id=self.consumer_name
                 )
+                idle_sleep = self.poll_interval
             
             iterator = next_iterator
-            await asyncio.sleep(0.1)  # Polling interval
+            await asyncio.sleep(idle_sleep)  # Polling interval
+            
+            if not records:
+                # Back off exponentially while the shard is empty
+                idle_sleep = min(idle_sleep * 2, self.max_poll_interval)
     
     async def _process_records(self, records: List[KinesisRecord]) -> None:
         """Process a batch of records."""
         if asyncio.iscoroutinefunction(self.processor):
             await self.processor(records)
+        elif self.executor is not None:
+            # CPU-bound work overlaps with polling of the other shards
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.processor, records)
         else:
             self.processor(records)
 
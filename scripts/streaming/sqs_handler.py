@@ -6,12 +6,17 @@ Handles forum posts, images, and profiles through the tiered pipeline.
 import asyncio
 import json
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Callable
+from typing import Deque, List, Dict, Any, Optional, Callable
 from uuid import UUID, uuid4
 from dataclasses import dataclass, field
+from collections import deque
 import random
 
 
+# Encoder built once instead of per json.dumps call; compact separators
+_encode_json = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
 @dataclass
 class SQSMessage:
     """Simulated SQS message."""
@@ -36,7 +41,7 @@ class SQSQueue:
     """
     queue_url: str
     queue_name: str
-    messages: List[SQSMessage] = field(default_factory=list)
+    messages: Deque[SQSMessage] = field(default_factory=deque)
     in_flight: Dict[str, SQSMessage] = field(default_factory=dict)
     dead_letter_queue: Optional['SQSQueue'] = None
     max_receive_count: int = 3
@@ -48,7 +53,7 @@ class SQSQueue:
         message = SQSMessage(
             message_id=message_id,
             receipt_handle=str(uuid4()),
-            body=json.dumps(body, default=str),
+            body=_encode_json(body),
             sent_timestamp=datetime.utcnow()
         )
         
@@ -69,7 +74,7 @@ class SQSQueue:
         
         for _ in range(min(max_messages, len(self.messages))):
             if self.messages:
-                message = self.messages.pop(0)
+                message = self.messages.popleft()
                 message.approximate_receive_count += 1
                 
                 # Check max receive count
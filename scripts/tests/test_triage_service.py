@@ -0,0 +1,41 @@
+"""
+Regression tests for Tier 1 triage pattern matching.
+"""
+
+import os
+import sys
+from uuid import uuid4
+
+# Ensure scripts directory is in path for imports
+_scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _scripts_dir not in sys.path:
+    sys.path.insert(0, _scripts_dir)
+
+from models.content import Content
+from models.enums import ContentType, SeverityLevel, ViolationType
+from services.triage_service import TriageService
+
+
+def _content(text: str) -> Content:
+    return Content(content_type=ContentType.FORUM_POST, user_id=uuid4(), text_content=text)
+
+
+def test_critical_match_overlapping_spam_match_blocks():
+    """A threat inside a shortener URL must still be found and blocked."""
+    text = 'check https://bit.ly/kill you now'
+
+    for result in (
+        TriageService().triage(_content(text)),
+        TriageService().triage_batch([_content(text)])[0],
+    ):
+        assert result.should_block
+        assert result.severity == SeverityLevel.CRITICAL
+        assert result.violations == [ViolationType.THREAT]
+
+
+def test_overlapping_spam_and_profanity_are_both_reported():
+    result = TriageService().triage(_content('free gift https://bit.ly/damn'))
+
+    assert ViolationType.SPAM in result.violations
+    assert ViolationType.PROFANITY in result.violations
+    assert result.severity == SeverityLevel.MEDIUM